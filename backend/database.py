@@ -1,26 +1,163 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import random
+import threading
+import time
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.datastructures import MutableHeaders
 from config import settings
 
-# ✅ Fixed for Render PostgreSQL — handles SSL drops & stale connections
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,        # Auto-reconnect if SSL dropped
-    pool_recycle=300,          # Recycle connections every 5 mins
-    pool_size=5,               # Max 5 connections in pool
-    max_overflow=2,            # Allow 2 extra connections
-    echo=False,                # Set False in production
-    connect_args={
-        "keepalives": 1,
-        "keepalives_idle": 30,
-        "keepalives_interval": 10,
-        "keepalives_count": 5,
-    }
-)
+if settings.is_sqlite:
+    # Embedded SQLite: connections are shared across FastAPI's threadpool
+    ENGINE_OPTIONS = dict(
+        echo=False,
+        connect_args={"check_same_thread": False}
+    )
+else:
+    # ✅ Fixed for Render PostgreSQL — handles SSL drops & stale connections
+    ENGINE_OPTIONS = dict(
+        pool_pre_ping=True,        # Auto-reconnect if SSL dropped
+        pool_recycle=300,          # Recycle connections every 5 mins
+        pool_size=5,               # Max 5 connections in pool
+        max_overflow=2,            # Allow 2 extra connections
+        echo=False,                # Set False in production
+        connect_args={
+            "keepalives": 1,
+            "keepalives_idle": 30,
+            "keepalives_interval": 10,
+            "keepalives_count": 5,
+        }
+    )
+
+engine = create_engine(settings.DATABASE_URL, **ENGINE_OPTIONS)
+
+if settings.is_sqlite:
+    # SQLite allows one writer at a time. Reads run outside any transaction (each
+    # statement sees the latest commit, like Postgres' READ COMMITTED), so there is
+    # never a stale read snapshot to upgrade. The first INSERT/UPDATE/DELETE of a
+    # session queues on a lock shared by this process and opens BEGIN IMMEDIATE;
+    # the lock is held until the connection goes back to the pool after commit or
+    # rollback. Sessions that only read (or hash passwords) never take it.
+    _sqlite_writer = threading.Lock()
+
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        # Transactions are opened by _sqlite_begin_write (pysqlite's implicit ones are unreliable)
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _sqlite_begin_write(conn, cursor, statement, parameters, context, executemany):
+        if context is None or not (context.isinsert or context.isupdate or context.isdelete):
+            return
+        dbapi_connection = cursor.connection
+        if dbapi_connection.in_transaction:
+            return
+        if not conn.info.get("writer"):
+            # On timeout carry on and let SQLite's own busy_timeout decide
+            conn.info["writer"] = _sqlite_writer.acquire(timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000)
+        dbapi_connection.execute("BEGIN IMMEDIATE")
+
+    @event.listens_for(engine, "checkin")
+    def _sqlite_release_writer(dbapi_connection, connection_record):
+        # Sessions hand their connection back once the transaction has committed or rolled back
+        if connection_record.info.pop("writer", False):
+            _sqlite_writer.release()
+
+# Optional read replicas (same pool settings as the primary)
+replica_engines = [create_engine(url, **ENGINE_OPTIONS) for url in settings.replica_urls]
+
+
+class RoutingSession(Session):
+    """Session that reads from its assigned replica and sends anything that writes to the primary"""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or getattr(clause, "is_dml", False):
+            # Once this session writes, keep the rest of it on the primary
+            self.info.pop("replica", None)
+        return self.info.get("replica", engine)
+
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
 Base = declarative_base()
 
+# Read-your-writes: clients that just wrote are pinned to the primary for a few seconds.
+# Pins are kept per Authorization header in this worker and mirrored in a cookie so
+# other workers see them too when the client sends cookies.
+PRIMARY_PIN_COOKIE = "msl_primary_until"
+_primary_pins: dict[str, float] = {}
+
+
+def pin_to_primary(request: Request, response: Response):
+    """Route this client's reads to the primary for REPLICA_PIN_SECONDS"""
+    if not replica_engines:
+        return
+    now = time.time()
+    until = now + settings.REPLICA_PIN_SECONDS
+    authorization = request.headers.get("authorization")
+    if authorization:
+        if len(_primary_pins) > 10000:
+            for key in [k for k, v in _primary_pins.items() if v < now]:
+                _primary_pins.pop(key, None)
+        _primary_pins[authorization] = until
+    response.set_cookie(
+        PRIMARY_PIN_COOKIE,
+        str(until),
+        max_age=settings.REPLICA_PIN_SECONDS,
+        httponly=True,
+        samesite="lax"
+    )
+
+
+def is_pinned_to_primary(request: Request) -> bool:
+    """True if this client wrote recently and must not read from a lagging replica"""
+    now = time.time()
+    authorization = request.headers.get("authorization")
+    if authorization and _primary_pins.get(authorization, 0) > now:
+        return True
+    try:
+        return float(request.cookies.get(PRIMARY_PIN_COOKIE, 0)) > now
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware pinning a client to the primary after a successful write (a pass-through without replicas)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replica_engines or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                pin = Response()
+                pin_to_primary(Request(scope), pin)
+                headers = MutableHeaders(scope=message)
+                for value in pin.headers.getlist("set-cookie"):
+                    headers.append("set-cookie", value)
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
+
+
+def dialect_insert(db: Session):
+    """insert() of the current backend, which supports on_conflict_do_update/do_nothing upserts"""
+    return sqlite.insert if db.get_bind().dialect.name == "sqlite" else postgresql.insert
+
+
 def get_db():
     """Dependency for getting database session"""
     db = SessionLocal()
@@ -28,3 +165,25 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def open_read_session(request: Request) -> Session:
+    """Read-only session on a replica unless the client just wrote (caller closes it)"""
+    db = ReadSessionLocal()
+    if replica_engines and not is_pinned_to_primary(request):
+        db.info["replica"] = random.choice(replica_engines)
+    return db
+
+
+def use_primary(db: Session):
+    """Send the rest of a read session's queries to the primary"""
+    db.info.pop("replica", None)
+
+
+def get_read_db(request: Request):
+    """Dependency for read-only handlers: uses a replica unless the client just wrote"""
+    db = open_read_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
@@ -4,12 +4,16 @@ import os
 # Add the current directory to sys.path to allow imports to work on Vercel
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import Base, engine
-from models import User, Quiz, Question, UserAnswer, Progress, Note 
-from routers import auth_router, quiz_router, progress_router, notes_router
+from database import Base, engine, ReadYourWritesMiddleware
+from models import User, Quiz, Question, UserAnswer, Progress, Note, UserVersion, QuizAttempt, QuizDailyStats, QuizCompletion, InvalidationVersion
+from routers import auth_router, quiz_router, progress_router, notes_router, dashboard_router, live_router, admin_router, export_router, reports_router
 from config import settings
+from utils.invalidation import start_listener, stop_listener
+from utils import profiler
+from utils.admission import AdmissionMiddleware
 
 # Create all database tables
 # Debug: Print DB Host to Vercel logs (excluding credentials)
@@ -21,12 +25,25 @@ except Exception:
 
 Base.metadata.create_all(bind=engine)   
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Hear about cache invalidations committed by other workers
+    start_listener()
+    profiler.start_route_sampler(app)
+    yield
+    profiler.stop_route_sampler()
+    stop_listener()
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
-    version=settings.APP_VERSION
+    version=settings.APP_VERSION,
+    lifespan=lifespan
 )
 
+# Shed load per route class before requests pile up on the threadpool and DB pool
+app.add_middleware(AdmissionMiddleware)
+
 # Add CORS middleware (allows frontend to call backend)
 app.add_middleware(
     CORSMiddleware,
@@ -36,11 +53,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Sample a request's endpoint when an admin asks for it (see utils.profiler)
+app.add_middleware(profiler.ProfileMiddleware)
+
+# Pin a client to the primary database for a moment after it writes
+app.add_middleware(ReadYourWritesMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(quiz_router)
 app.include_router(progress_router)
 app.include_router(notes_router)
+app.include_router(dashboard_router)
+app.include_router(live_router)
+app.include_router(admin_router)
+app.include_router(export_router)
+app.include_router(reports_router)
 
 @app.get("/")
 def read_root():
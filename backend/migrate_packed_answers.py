@@ -0,0 +1,90 @@
+"""Move per-question user_answers rows into packed quiz_attempts rows.
+
+Usage (from the backend folder):
+    python migrate_packed_answers.py
+
+user_answers has no attempt id, so rows are grouped per (user, quiz) in insertion
+order and a new attempt starts whenever a question repeats. Attempts are matched,
+in the same order, to that user's progress rows for the quiz that no quiz_attempts
+row points at yet (rows of submissions already stored packed are skipped). Set
+PACKED_ANSWERS=true afterwards so new submissions are stored packed too.
+
+Each (user, quiz) pair is packed and its user_answers rows deleted in one
+transaction, because readers count both tables and would see every answer twice
+otherwise. Any user_answers row left is therefore unmigrated, so the script can be
+run again at any time (e.g. after rows written just before the flag was flipped).
+"""
+from datetime import datetime
+from database import Base, engine, SessionLocal
+from models import User, Quiz, Question, UserAnswer, Progress, Note, UserVersion, QuizAttempt, QuizDailyStats, QuizCompletion
+from utils.packing import pack_attempt
+
+
+def _attempts(rows):
+    """Split one (user, quiz) run of rows into attempts, each {question_id: row}"""
+    attempt = {}
+    for row in rows:
+        if row.question_id in attempt:
+            yield attempt
+            attempt = {}
+        attempt[row.question_id] = row
+    if attempt:
+        yield attempt
+
+
+def migrate():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        question_keys = {}  # quiz_id -> (question ids in order, correct answers)
+        packed = 0
+        pairs = db.query(UserAnswer.user_id, UserAnswer.quiz_id).distinct().all()
+        for user_id, quiz_id in pairs:
+            if quiz_id not in question_keys:
+                questions = db.query(Question.id, Question.correct_answer).filter(
+                    Question.quiz_id == quiz_id
+                ).order_by(Question.id).all()
+                question_keys[quiz_id] = ([q.id for q in questions], [q.correct_answer for q in questions])
+            question_ids, correct_answers = question_keys[quiz_id]
+
+            rows = db.query(UserAnswer).filter(
+                UserAnswer.user_id == user_id,
+                UserAnswer.quiz_id == quiz_id
+            ).order_by(UserAnswer.id).all()
+            progress = db.query(Progress).filter(
+                Progress.user_id == user_id,
+                Progress.quiz_id == quiz_id,
+                ~db.query(QuizAttempt.id).filter(QuizAttempt.progress_id == Progress.id).exists()
+            ).order_by(Progress.id).all()
+            attempts = list(_attempts(rows))
+            if len(progress) != len(attempts):
+                progress = [None] * len(attempts)
+
+            for attempt, progress_row in zip(attempts, progress):
+                answers = [attempt[qid].user_answer if qid in attempt else None for qid in question_ids]
+                packed_answers, answered, correct = pack_attempt(correct_answers, answers)
+                db.add(QuizAttempt(
+                    user_id=user_id,
+                    quiz_id=quiz_id,
+                    progress_id=progress_row.id if progress_row else None,
+                    question_count=len(question_ids),
+                    answers=packed_answers,
+                    answered=answered,
+                    correct=correct,
+                    completed_at=progress_row.completed_at if progress_row else datetime.utcnow()
+                ))
+                packed += 1
+
+            db.query(UserAnswer).filter(
+                UserAnswer.user_id == user_id,
+                UserAnswer.quiz_id == quiz_id
+            ).delete()
+            # One transaction per (user, quiz) keeps each step small
+            db.commit()
+        print(f"Packed {packed} attempts from {len(pairs)} user/quiz pairs")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -5,5 +5,10 @@ from .question import Question
 from .user_answer import UserAnswer
 from .progress import Progress
 from .notes import Note
+from .user_version import UserVersion
+from .quiz_attempt import QuizAttempt
+from .report import QuizDailyStats, QuizCompletion
+from .invalidation_version import InvalidationVersion
 
-__all__ = ["User", "Quiz", "Question", "UserAnswer", "Progress", "Note"]
+__all__ = ["User", "Quiz", "Question", "UserAnswer", "Progress", "Note", "UserVersion", "QuizAttempt",
+           "QuizDailyStats", "QuizCompletion", "InvalidationVersion"]
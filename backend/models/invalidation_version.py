@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from database import Base
+
+class InvalidationVersion(Base):
+    __tablename__ = "invalidation_versions"
+    
+    # SQLite only: bumped by every committed invalidation of a kind, polled by the other workers
+    kind = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
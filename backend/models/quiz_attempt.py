@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, ForeignKey, LargeBinary, DateTime
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from database import Base
+
+class QuizAttempt(Base):
+    __tablename__ = "quiz_attempts"
+    
+    # One row per submitted attempt; answers are packed in the quiz's question order (by question id)
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id"), index=True)
+    progress_id = Column(Integer, ForeignKey("progress.id"), nullable=True)
+    question_count = Column(Integer)
+    answers = Column(LargeBinary)   # 2 bits per question: a=0, b=1, c=2, d=3
+    answered = Column(LargeBinary)  # 1 bit per question: did the user answer it
+    correct = Column(LargeBinary)   # 1 bit per question: was the answer correct
+    completed_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    user = relationship("User", back_populates="quiz_attempts")
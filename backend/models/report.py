@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey
+from datetime import datetime
+from database import Base
+
+SCORE_BUCKETS = 10  # histogram of scores in 10-point buckets (90-100 is the last)
+
+class QuizDailyStats(Base):
+    __tablename__ = "quiz_daily_stats"
+    
+    # Running totals per quiz x course x day, kept up to date by every submission
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"), primary_key=True)
+    course = Column(String, primary_key=True)  # "" for students without a course
+    day = Column(Date, primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0)
+    correct_sum = Column(Integer, nullable=False, default=0)
+    question_sum = Column(Integer, nullable=False, default=0)
+    bucket_0 = Column(Integer, nullable=False, default=0)
+    bucket_1 = Column(Integer, nullable=False, default=0)
+    bucket_2 = Column(Integer, nullable=False, default=0)
+    bucket_3 = Column(Integer, nullable=False, default=0)
+    bucket_4 = Column(Integer, nullable=False, default=0)
+    bucket_5 = Column(Integer, nullable=False, default=0)
+    bucket_6 = Column(Integer, nullable=False, default=0)
+    bucket_7 = Column(Integer, nullable=False, default=0)
+    bucket_8 = Column(Integer, nullable=False, default=0)
+    bucket_9 = Column(Integer, nullable=False, default=0)
+
+class QuizCompletion(Base):
+    __tablename__ = "quiz_completions"
+    
+    # First completion of a quiz by a student (drives completion rates)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    course = Column(String, index=True)
+    completed_at = Column(DateTime, default=datetime.utcnow)
@@ -16,4 +16,5 @@ class User(Base):
     # Relationships
     progress = relationship("Progress", back_populates="user")
     user_answers = relationship("UserAnswer", back_populates="user")
+    quiz_attempts = relationship("QuizAttempt", back_populates="user")
     notes = relationship("Note", back_populates="user")
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from database import Base
+
+class UserVersion(Base):
+    __tablename__ = "user_versions"
+    
+    # Bumped on every write to a user's notes, progress or profile (drives per-user ETags)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
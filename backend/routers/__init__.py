@@ -3,5 +3,10 @@ from .auth import router as auth_router
 from .quiz import router as quiz_router
 from .progress import router as progress_router
 from .notes import router as notes_router
+from .dashboard import router as dashboard_router
+from .live import router as live_router
+from .admin import router as admin_router
+from .export import router as export_router
+from .reports import router as reports_router
 
-__all__ = ["auth_router", "quiz_router", "progress_router", "notes_router"]
+__all__ = ["auth_router", "quiz_router", "progress_router", "notes_router", "dashboard_router", "live_router", "admin_router", "export_router", "reports_router"]
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Optional
+from database import get_db, open_read_session
+from models.user import User
+from utils.security import require_admin
+from utils import profiler
+from utils.admission import controller as admission
+from utils.reports import rebuild_reports
+from .export import export_response, parse_export_options
+
+router = APIRouter(
+    prefix="/api/admin",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin)]
+)
+
+@router.get("/profiles")
+def list_request_profiles():
+    """Recent on-demand request profiles (newest first)"""
+    return profiler.list_profiles()
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_request_profile(profile_id: str):
+    """One request profile as collapsed stacks (flamegraph.pl / speedscope format)"""
+    profile = profiler.get_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return profile.collapsed()
+
+@router.get("/profile-link")
+def get_profile_link(
+    path: str,
+    seconds: int = Query(profiler.PROFILE_LINK_SECONDS, ge=1, le=24 * 60 * 60, description="How long the link works")
+):
+    """Signed, expiring ?profile= value that profiles requests to this path"""
+    signature = profiler.profile_signature(path, seconds)
+    return {"path": path, "query": f"profile={signature}", "expires": int(signature.split(".")[0])}
+
+@router.get("/profile/routes")
+def get_route_samples(route: Optional[str] = None, collapsed: bool = False):
+    """Samples per route from the continuous sampler (collapsed=true for flamegraph text)"""
+    if profiler.route_sampler is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Continuous sampling is off (set PROFILER_SAMPLE_INTERVAL_MS)"
+        )
+    if collapsed:
+        return PlainTextResponse(profiler.route_sampler.collapsed(route))
+    return profiler.route_sampler.summary()
+
+@router.delete("/profile/routes")
+def reset_route_samples():
+    """Start the continuous sampler's aggregation from scratch"""
+    if profiler.route_sampler is not None:
+        profiler.route_sampler.reset()
+    return {"message": "Route samples cleared"}
+
+@router.get("/admission")
+def get_admission_stats():
+    """Concurrency, queue length, rejections and wait times per route class"""
+    return admission.stats()
+
+@router.get("/export")
+def export_course(
+    request: Request,
+    course: str,
+    format: str = Query("ndjson", description="ndjson or csv"),
+    sections: Optional[str] = Query(None, description="Comma-separated subset of: progress, answers, notes"),
+    gzip: bool = False
+):
+    """Stream the progress, answers and notes of every student in a course"""
+    selected = parse_export_options(format, sections)
+    # The export's own session, not a dependency, which would stay checked out next to it until the stream ends
+    db = open_read_session(request)
+    try:
+        user_ids = [user_id for (user_id,) in db.query(User.id).filter(User.course == course).order_by(User.id)]
+    except Exception:
+        db.close()
+        raise
+    return export_response(db, user_ids, selected, format, gzip, f"my-study-life-{course}")
+
+@router.post("/reports/rebuild")
+def rebuild_report_tables(
+    days: Optional[int] = Query(None, ge=1, description="Only recompute the last N days"),
+    db: Session = Depends(get_db)
+):
+    """Recompute the class report aggregates from progress (backfill, or a scheduled repair of recent days)"""
+    since = datetime.utcnow().date() - timedelta(days=days - 1) if days else None
+    result = rebuild_reports(db, since)
+    db.commit()
+    return {"since": since.isoformat() if since else None, **result}
@@ -5,7 +5,9 @@ from datetime import timedelta
 from database import get_db
 from models.user import User
 from schemas.user import UserCreate, UserResponse, Token
-from utils.security import hash_password, verify_password, create_access_token, get_current_user_dependency
+from utils.security import hash_password, verify_password, create_access_token, get_current_user_dependency, get_current_reader_dependency
+from utils.etag import bump_user_version, check_user_etag
+from utils.invalidation import Invalidation, publish
 from config import settings
 from typing import Optional
 from pydantic import BaseModel
@@ -82,9 +84,9 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
         "token_type": "bearer"
     }
 
-@router.get("/me", response_model=UserResponse)
+@router.get("/me", response_model=UserResponse, dependencies=[Depends(check_user_etag)])
 def get_current_user(
-    current_user: User = Depends(get_current_user_dependency)
+    current_user: User = Depends(get_current_reader_dependency)
 ):
     """Get current logged-in user"""
     return current_user
@@ -101,6 +103,8 @@ def update_profile(
     if request.course:
         current_user.course = request.course
 
+    bump_user_version(db, current_user.id)
+    publish(db, Invalidation.USER, current_user.id)
     db.commit()
     db.refresh(current_user)
     return current_user
@@ -119,6 +123,7 @@ def change_password(
         )
 
     current_user.hashed_password = hash_password(request.new_password)
+    publish(db, Invalidation.USER, current_user.id)
     db.commit()
 
     return {"message": "Password changed successfully"}
@@ -130,5 +135,6 @@ def delete_account(
 ):
     """Delete user account and all associated data"""
     db.delete(current_user)
+    publish(db, Invalidation.USER, current_user.id)
     db.commit()
     return {"message": "Account deleted successfully"}
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Optional
+from database import get_read_db
+from models.progress import Progress
+from models.user import User
+from schemas.dashboard import DashboardResponse
+from utils.security import get_current_reader_dependency
+from .progress import compute_user_stats
+from .quiz import cached_quiz_catalog
+
+router = APIRouter(
+    prefix="/api/dashboard",
+    tags=["Dashboard"]
+)
+
+DASHBOARD_FIELDS = ("user", "stats", "progress", "quizzes")
+
+@router.get("", response_model=DashboardResponse, response_model_exclude_unset=True)
+def get_dashboard(
+    fields: Optional[str] = Query(None, description="Comma-separated subset of: user, stats, progress, quizzes"),
+    recent: int = Query(10, ge=1, le=100, description="How many recent quiz results to include"),
+    current_user: User = Depends(get_current_reader_dependency),
+    db: Session = Depends(get_read_db)
+):
+    """Everything the dashboard page needs in one authenticated call"""
+    selected = set(DASHBOARD_FIELDS)
+    if fields:
+        selected = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = selected - set(DASHBOARD_FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown dashboard fields: {', '.join(sorted(unknown))}"
+            )
+    
+    dashboard = {}
+    if "user" in selected:
+        dashboard["user"] = current_user
+    if "stats" in selected:
+        dashboard["stats"] = compute_user_stats(db, current_user.id)
+    if "progress" in selected:
+        dashboard["progress"] = (
+            db.query(Progress)
+            .filter(Progress.user_id == current_user.id)
+            .order_by(Progress.completed_at.desc())
+            .limit(recent)
+            .all()
+        )
+    if "quizzes" in selected:
+        # Last, because a cache miss moves this session to the primary
+        dashboard["quizzes"] = cached_quiz_catalog(db)
+    return dashboard
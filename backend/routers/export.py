@@ -0,0 +1,200 @@
+import csv
+import io
+import json
+import re
+import zlib
+from urllib.parse import quote
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Iterator, Optional
+from database import open_read_session
+from models.notes import Note
+from models.progress import Progress
+from models.quiz_attempt import QuizAttempt
+from models.user_answer import UserAnswer
+from utils.packing import decode_attempt
+from utils.question_index import question_index
+from utils.security import get_current_reader
+
+router = APIRouter(
+    prefix="/api/export",
+    tags=["Export"]
+)
+
+EXPORT_BATCH = 1000         # rows fetched per round trip (server-side cursor on Postgres)
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+SECTION_COLUMNS = {
+    "progress": ["id", "user_id", "quiz_id", "total_questions", "correct_answers", "wrong_answers", "score", "completed_at"],
+    "answers": ["user_id", "quiz_id", "attempt_id", "question_id", "answer", "is_correct"],
+    "notes": ["id", "user_id", "title", "description", "color", "is_starred", "created_at", "updated_at"],
+}
+
+
+def _stream(db: Session, stmt):
+    """Execute stmt without buffering the whole result"""
+    return db.execute(stmt.execution_options(yield_per=EXPORT_BATCH))
+
+
+def _progress(db: Session, user_ids: list[int]) -> Iterator[dict]:
+    columns = [getattr(Progress, name) for name in SECTION_COLUMNS["progress"]]
+    stmt = select(*columns).where(Progress.user_id.in_(user_ids)).order_by(Progress.user_id, Progress.id)
+    for row in _stream(db, stmt):
+        yield row._asdict()
+
+
+def _notes(db: Session, user_ids: list[int]) -> Iterator[dict]:
+    columns = [getattr(Note, name) for name in SECTION_COLUMNS["notes"]]
+    stmt = select(*columns).where(Note.user_id.in_(user_ids)).order_by(Note.user_id, Note.id)
+    for row in _stream(db, stmt):
+        yield row._asdict()
+
+
+def _answers(db: Session, user_ids: list[int]) -> Iterator[dict]:
+    stmt = select(
+        UserAnswer.user_id, UserAnswer.quiz_id, UserAnswer.question_id,
+        UserAnswer.user_answer, UserAnswer.is_correct
+    ).where(UserAnswer.user_id.in_(user_ids)).order_by(UserAnswer.user_id, UserAnswer.id)
+    for row in _stream(db, stmt):
+        yield {
+            "user_id": row.user_id,
+            "quiz_id": row.quiz_id,
+            "attempt_id": None,
+            "question_id": row.question_id,
+            "answer": row.user_answer,
+            "is_correct": row.is_correct
+        }
+
+    # Packed attempts expand to one record per answered question
+    stmt = select(
+        QuizAttempt.id, QuizAttempt.user_id, QuizAttempt.quiz_id, QuizAttempt.question_count,
+        QuizAttempt.answers, QuizAttempt.answered, QuizAttempt.correct
+    ).where(QuizAttempt.user_id.in_(user_ids)).order_by(QuizAttempt.user_id, QuizAttempt.id)
+    for attempt in _stream(db, stmt):
+        question_ids = question_index.quiz_question_ids(attempt.quiz_id)
+        for question_id, answer, is_correct in decode_attempt(attempt, question_ids):
+            if answer is None:
+                continue
+            yield {
+                "user_id": attempt.user_id,
+                "quiz_id": attempt.quiz_id,
+                "attempt_id": attempt.id,
+                "question_id": question_id,
+                "answer": answer,
+                "is_correct": is_correct
+            }
+
+
+SECTIONS = {"progress": _progress, "answers": _answers, "notes": _notes}
+
+
+def _plain(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def export_lines(db: Session, user_ids: list[int], sections: list[str], fmt: str) -> Iterator[str]:
+    """Records of the chosen sections as NDJSON lines, or CSV rows (one section only)"""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        columns = SECTION_COLUMNS[sections[0]]
+        writer.writerow(columns)
+        for record in SECTIONS[sections[0]](db, user_ids):
+            writer.writerow([_plain(record[column]) for column in columns])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        return
+    for section in sections:
+        for record in SECTIONS[section](db, user_ids):
+            yield json.dumps({"section": section, **record}, default=_plain) + "\n"
+
+
+def stream_export(db: Session, user_ids: list[int], sections: list[str], fmt: str, gzip: bool) -> Iterator[bytes]:
+    """Encode export_lines into ~64 KB chunks (gzipped if asked) and close db when done"""
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+    chunk = []
+    size = 0
+    try:
+        for line in export_lines(db, user_ids, sections, fmt):
+            data = line.encode()
+            chunk.append(data)
+            size += len(data)
+            if size >= EXPORT_CHUNK_BYTES:
+                block = b"".join(chunk)
+                chunk, size = [], 0
+                block = compressor.compress(block) if compressor else block
+                if block:
+                    yield block
+        block = b"".join(chunk)
+        if compressor:
+            block = compressor.compress(block) + compressor.flush()
+        if block:
+            yield block
+    finally:
+        db.close()
+
+
+def parse_export_options(format: str, sections: Optional[str]) -> list[str]:
+    """Validate ?format= and ?sections=, raising 400 on bad values"""
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="format must be ndjson or csv")
+    selected = [s.strip() for s in sections.split(",") if s.strip()] if sections else list(SECTIONS)
+    unknown = [s for s in selected if s not in SECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown export sections: {', '.join(unknown)}"
+        )
+    if format == "csv" and len(selected) != 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV exports one section at a time (e.g. sections=progress)"
+        )
+    return selected
+
+
+def content_disposition(filename: str) -> str:
+    """attachment header safe for any filename: ASCII fallback plus RFC 5987 filename*"""
+    fallback = re.sub(r"[^A-Za-z0-9._-]", "_", filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def export_response(db: Session, user_ids: list[int], sections: list[str], format: str, gzip: bool, name: str):
+    """StreamingResponse that streams from db and closes it when done.
+
+    Callers open db with open_read_session() and do their own lookups on it, so an
+    export holds exactly one connection for as long as it streams (yield
+    dependencies would only be torn down after the body, next to it).
+    """
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"{name}.{format}"
+    if gzip:
+        media_type = "application/gzip"
+        filename += ".gz"
+    return StreamingResponse(
+        stream_export(db, user_ids, sections, format, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": content_disposition(filename)}
+    )
+
+
+@router.get("")
+def export_my_data(
+    request: Request,
+    format: str = Query("ndjson", description="ndjson or csv"),
+    sections: Optional[str] = Query(None, description="Comma-separated subset of: progress, answers, notes"),
+    gzip: bool = False,
+    authorization: Optional[str] = Header(None)
+):
+    """Download the current user's progress, answers and notes (streamed, constant memory)"""
+    selected = parse_export_options(format, sections)
+    db = open_read_session(request)
+    try:
+        current_user = get_current_reader(authorization, db)
+    except Exception:
+        db.close()
+        raise
+    return export_response(db, [current_user.id], selected, format, gzip, f"my-study-life-{current_user.id}")
@@ -0,0 +1,181 @@
+import json
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+from sqlalchemy.orm import Session
+from database import SessionLocal, get_db
+from models.question import Question
+from models.quiz import Quiz
+from models.user import User
+from schemas.live import LiveSessionCreate, LiveNextQuestion, LiveSessionResponse
+from utils.security import get_current_user_dependency, get_user_by_token
+from utils.live import LiveSession, Participant, add_session, sessions
+from .quiz import save_submission
+
+router = APIRouter(
+    prefix="/api/live",
+    tags=["Live"]
+)
+
+# Codes of sessions whose results are being saved right now (guards against a double /end)
+_saving: set[str] = set()
+
+
+def _load_quiz(quiz_id: int):
+    """Quiz title, the questions students see, and the answer key kept server-side"""
+    db = SessionLocal()
+    try:
+        quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
+        if not quiz:
+            return None
+        questions = db.query(Question).filter(Question.quiz_id == quiz_id).order_by(Question.id).all()
+        visible = [
+            {
+                "id": q.id,
+                "question_text": q.question_text,
+                "option_a": q.option_a,
+                "option_b": q.option_b,
+                "option_c": q.option_c,
+                "option_d": q.option_d
+            }
+            for q in questions
+        ]
+        return quiz.title, visible, [(q.id, q.correct_answer) for q in questions]
+    finally:
+        db.close()
+
+
+def _authenticate(token: Optional[str]):
+    db = SessionLocal()
+    try:
+        user = get_user_by_token(f"Bearer {token}" if token else None, db)
+        return (user.id, user.full_name) if user else None
+    finally:
+        db.close()
+
+
+def _save_results(session: LiveSession, db: Session):
+    """Store every student's live answers like a normal quiz submission"""
+    for participant in list(session.participants.values()):
+        if participant.is_host or not participant.answers:
+            continue
+        save_submission(db, participant.user_id, session.quiz_id, session.answer_key, participant.answers)
+    db.commit()
+
+
+def _session_response(session: LiveSession) -> dict:
+    return {
+        "code": session.code,
+        "quiz_id": session.quiz_id,
+        "title": session.title,
+        "total_questions": len(session.questions),
+        "current": session.current,
+        "participants": session.connected_students()
+    }
+
+
+def _get_session(code: str) -> LiveSession:
+    session = sessions.get(code.upper())
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live session not found")
+    return session
+
+
+def _get_hosted_session(code: str, current_user: User) -> LiveSession:
+    session = _get_session(code)
+    if session.host_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only the host can control this session")
+    return session
+
+
+@router.post("/sessions", response_model=LiveSessionResponse)
+async def create_live_session(
+    request: LiveSessionCreate,
+    current_user: User = Depends(get_current_user_dependency)
+):
+    """Start a live session for a quiz; students join with the returned code"""
+    loaded = await run_in_threadpool(_load_quiz, request.quiz_id)
+    if not loaded:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
+    title, questions, answer_key = loaded
+    if not questions:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Quiz has no questions")
+    
+    session = LiveSession(request.quiz_id, title, current_user.id, questions, answer_key)
+    add_session(session)
+    return _session_response(session)
+
+
+@router.get("/{code}", response_model=LiveSessionResponse)
+async def get_live_session(code: str):
+    """Current state of a live session"""
+    return _session_response(_get_session(code))
+
+
+@router.post("/{code}/next", response_model=LiveSessionResponse)
+async def next_live_question(
+    code: str,
+    request: LiveNextQuestion,
+    current_user: User = Depends(get_current_user_dependency)
+):
+    """Push the next question to everyone in the session (host only)"""
+    session = _get_hosted_session(code, current_user)
+    if session.ended:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Live session has ended")
+    if not session.next_question(request.seconds):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No more questions")
+    return _session_response(session)
+
+
+@router.post("/{code}/end")
+async def end_live_session(
+    code: str,
+    current_user: User = Depends(get_current_user_dependency),
+    db: Session = Depends(get_db)
+):
+    """Finish the session, save everyone's results and close all sockets (host only)"""
+    session = _get_hosted_session(code, current_user)
+    if session.code in _saving:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Live session is already being ended")
+    # Stop taking answers first, so nothing is scored that the save below would miss
+    session.ended = True
+    _saving.add(session.code)
+    try:
+        await run_in_threadpool(_save_results, session, db)
+    finally:
+        _saving.discard(session.code)
+    # Only forget the session once its results are stored: if saving failed it stays
+    # registered (still refusing answers) so the host can call /end again
+    sessions.pop(session.code, None)
+    await session.end()
+    return {"message": "Live session ended", "leaderboard": session.leaderboard()}
+
+
+@router.websocket("/{code}/ws")
+async def live_socket(websocket: WebSocket, code: str, token: Optional[str] = None):
+    """Students send {"question_id": 1, "answer": "b"}; the server pushes questions and live results"""
+    session = sessions.get(code.upper())
+    user = await run_in_threadpool(_authenticate, token)
+    if not session or session.ended or not user:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    user_id, name = user
+    participant = Participant(user_id, name, websocket, is_host=user_id == session.host_id)
+    session.join(participant)
+    try:
+        while True:
+            message = await websocket.receive_json()
+            try:
+                question_id = int(message["question_id"])
+                answer = message["answer"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            accepted = session.answer(participant, question_id, answer)
+            participant.send(json.dumps({"type": "ack", "question_id": question_id, "accepted": accepted}))
+    except (WebSocketDisconnect, RuntimeError, ValueError):
+        pass
+    finally:
+        if not session.ended:
+            session.drop(participant)
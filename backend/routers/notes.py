@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_read_db
 from models.notes import Note
 from models.user import User
 from schemas.notes import NoteCreate, NoteUpdate, Note as NoteSchema
-from utils.security import get_current_user_dependency
+from utils.security import get_current_user_dependency, get_current_reader_dependency
+from utils.etag import bump_user_version, check_user_etag
+from utils.invalidation import Invalidation, publish
 
 router = APIRouter(prefix="/api/notes", tags=["notes"])
 
@@ -23,15 +25,17 @@ def create_note(
         user_id=current_user.id
     )
     db.add(db_note)
+    bump_user_version(db, current_user.id)
+    publish(db, Invalidation.NOTES, current_user.id)
     db.commit()
     db.refresh(db_note)
     return db_note
 
 
-@router.get("/", response_model=list[NoteSchema])
+@router.get("/", response_model=list[NoteSchema], dependencies=[Depends(check_user_etag)])
 def get_user_notes(
-    current_user: User = Depends(get_current_user_dependency),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_reader_dependency),
+    db: Session = Depends(get_read_db)
 ):
     """Get all notes for the current user"""
     notes = db.query(Note).filter(Note.user_id == current_user.id).all()
@@ -41,8 +45,8 @@ def get_user_notes(
 @router.get("/{note_id}", response_model=NoteSchema)
 def get_note(
     note_id: int,
-    current_user: User = Depends(get_current_user_dependency),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_reader_dependency),
+    db: Session = Depends(get_read_db)
 ):
     """Get a specific note"""
     note = db.query(Note).filter(Note.id == note_id, Note.user_id == current_user.id).first()
@@ -68,6 +72,8 @@ def update_note(
         setattr(db_note, key, value)
     
     db.add(db_note)
+    bump_user_version(db, current_user.id)
+    publish(db, Invalidation.NOTES, current_user.id)
     db.commit()
     db.refresh(db_note)
     return db_note
@@ -85,6 +91,8 @@ def delete_note(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
     
     db.delete(db_note)
+    bump_user_version(db, current_user.id)
+    publish(db, Invalidation.NOTES, current_user.id)
     db.commit()
     return {"message": "Note deleted successfully"}
 
@@ -102,6 +110,8 @@ def toggle_star(
     
     db_note.is_starred = not db_note.is_starred
     db.add(db_note)
+    bump_user_version(db, current_user.id)
+    publish(db, Invalidation.NOTES, current_user.id)
     db.commit()
     db.refresh(db_note)
     return db_note
@@ -1,20 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_read_db
 from models.progress import Progress
 from models.user import User
 from schemas.progress import ProgressResponse
-from utils.security import get_current_user_dependency
+from utils.security import get_current_reader_dependency
+from utils.etag import check_user_etag
 
 router = APIRouter(
     prefix="/api/progress",
     tags=["Progress"]
 )
 
-@router.get("/user", response_model=list[ProgressResponse])
+@router.get("/user", response_model=list[ProgressResponse], dependencies=[Depends(check_user_etag)])
 def get_user_progress(
-    current_user: User = Depends(get_current_user_dependency),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_reader_dependency),
+    db: Session = Depends(get_read_db)
 ):
     """Get all quiz results for current user"""
     progress_list = db.query(Progress).filter(Progress.user_id == current_user.id).all()
@@ -23,8 +25,8 @@ def get_user_progress(
 @router.get("/quiz/{quiz_id}")
 def get_quiz_result(
     quiz_id: int,
-    current_user: User = Depends(get_current_user_dependency),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_reader_dependency),
+    db: Session = Depends(get_read_db)
 ):
     """Get result for specific quiz taken by user"""
     progress = db.query(Progress).filter(
@@ -40,15 +42,24 @@ def get_quiz_result(
     
     return progress
 
-@router.get("/stats")
+@router.get("/stats", dependencies=[Depends(check_user_etag)])
 def get_user_stats(
-    current_user: User = Depends(get_current_user_dependency),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_reader_dependency),
+    db: Session = Depends(get_read_db)
 ):
     """Get user statistics"""
-    progress_list = db.query(Progress).filter(Progress.user_id == current_user.id).all()
+    return compute_user_stats(db, current_user.id)
+
+def compute_user_stats(db: Session, user_id: int) -> dict:
+    """Aggregate a user's quiz results in the database instead of loading every row"""
+    total_quizzes, total_correct, total_questions, average_score = db.query(
+        func.count(Progress.id),
+        func.coalesce(func.sum(Progress.correct_answers), 0),
+        func.coalesce(func.sum(Progress.total_questions), 0),
+        func.coalesce(func.avg(Progress.score), 0)
+    ).filter(Progress.user_id == user_id).one()
     
-    if not progress_list:
+    if not total_quizzes:
         return {
             "total_quizzes": 0,
             "average_score": 0,
@@ -59,24 +70,17 @@ def get_user_stats(
             "study_hours": 0
         }
     
-    total_correct = sum(p.correct_answers for p in progress_list)
-    total_questions = sum(p.total_questions for p in progress_list)
-    average_score = sum(p.score for p in progress_list) / len(progress_list)
     accuracy = (total_correct / total_questions * 100) if total_questions > 0 else 0
     
     # Calculate study hours based on quiz attempts (rough estimate: 1 hour per 50 questions)
     study_hours = max(1, total_questions // 50)
     
-    # Calculate streak (simplified: count consecutive days with quizzes)
-    current_streak = 0
-    if progress_list:
-        # Sort by date
-        sorted_progress = sorted(progress_list, key=lambda p: p.completed_at, reverse=True)
-        current_streak = len(sorted_progress)  # Simple approach
+    # Calculate streak (simplified: count of quizzes taken)
+    current_streak = total_quizzes
     
     return {
-        "total_quizzes": len(progress_list),
-        "average_score": round(average_score, 2),
+        "total_quizzes": total_quizzes,
+        "average_score": round(float(average_score), 2),
         "accuracy": round(accuracy, 2),
         "current_streak": current_streak,
         "total_questions": total_questions,
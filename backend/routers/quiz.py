@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import threading
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from database import get_db
+from database import SessionLocal, get_db, get_read_db, use_primary
 from models.quiz import Quiz
 from models.question import Question
 from models.progress import Progress
 from models.user import User
 from models.user_answer import UserAnswer
-from schemas.quiz import QuizCreate, QuizResponse, QuestionCreate, QuizWithQuestions
+from models.quiz_attempt import QuizAttempt
+from schemas.quiz import QuizCreate, QuizResponse, QuestionCreate, QuestionResponse, QuizWithQuestions
 from schemas.progress import QuizSubmission
-from utils.security import get_current_user_dependency
+from utils.security import get_current_user, get_current_user_dependency
+from utils.packing import OPTIONS, decode_attempt, pack_attempt, tally_attempts
+from utils.question_index import question_index
+from utils.reports import record_result
+from utils.idempotency import clean_key, submissions
+from config import settings
+from utils.etag import bump_user_version
+from utils.invalidation import Invalidation, publish, subscribe
 
 router = APIRouter(
     prefix="/api/quiz",
@@ -20,24 +31,114 @@ def create_quiz(quiz: QuizCreate, db: Session = Depends(get_db)):
     """Create new quiz (Admin only)"""
     db_quiz = Quiz(**quiz.dict())
     db.add(db_quiz)
+    db.flush()
+    publish(db, Invalidation.QUIZ, db_quiz.id)
     db.commit()
     db.refresh(db_quiz)
     return db_quiz
 
 @router.get("/all", response_model=list[QuizResponse])
-def get_all_quizzes(db: Session = Depends(get_db)):
+def get_all_quizzes():
     """Get all available quizzes with actual question counts"""
-    from sqlalchemy import func
+    return cached_quiz_catalog()
+
+def list_quizzes_with_counts(db: Session) -> list[Quiz]:
+    """Load every quiz with its real question count (one grouped count, not one query per quiz)"""
+    counts = dict(
+        db.query(Question.quiz_id, func.count(Question.id))
+        .group_by(Question.quiz_id)
+        .all()
+    )
     quizzes = db.query(Quiz).all()
     for quiz in quizzes:
-        # Get actual count from questions table
-        count = db.query(func.count(Question.id)).filter(Question.quiz_id == quiz.id).scalar()
-        quiz.total_questions = count
+        quiz.total_questions = counts.get(quiz.id, 0)
     return quizzes
 
+# Quiz catalog cached per worker, dropped on any quiz/question change (see utils.invalidation)
+_catalog: list[QuizResponse] | None = None
+_catalog_generation = 0
+_catalog_lock = threading.Lock()
+
+def cached_quiz_catalog(db: Optional[Session] = None) -> list[QuizResponse]:
+    """Quiz catalog with question counts, loaded from the primary at most once per change.
+
+    On a miss it is loaded through db when given (a read session is switched to the
+    primary for it), otherwise through a short-lived session of its own.
+    """
+    global _catalog
+    catalog = _catalog
+    if catalog is not None:
+        return catalog
+    generation = _catalog_generation
+    if db is not None:
+        use_primary(db)
+        catalog = [QuizResponse.model_validate(quiz) for quiz in list_quizzes_with_counts(db)]
+    else:
+        own_db = SessionLocal()
+        try:
+            catalog = [QuizResponse.model_validate(quiz) for quiz in list_quizzes_with_counts(own_db)]
+        finally:
+            own_db.close()
+    with _catalog_lock:
+        # Don't keep a catalog that was loaded while an invalidation arrived
+        if generation == _catalog_generation:
+            _catalog = catalog
+    return catalog
+
+def _invalidate_catalog(quiz_id: int | None):
+    global _catalog, _catalog_generation
+    with _catalog_lock:
+        _catalog = None
+        _catalog_generation += 1
+
+subscribe(Invalidation.QUIZ, _invalidate_catalog)
+
+@router.get("/practice", response_model=list[QuestionResponse])
+def get_practice_questions(
+    subject: str,
+    grade: int,
+    count: int = Query(20, ge=1, le=300),
+    weighted: bool = Query(False, description="Favour questions the user answered wrong before (needs login)"),
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db)
+):
+    """Random practice questions drawn from every quiz for a subject and grade"""
+    missed = None
+    if weighted:
+        user = get_current_user(authorization, db)
+        missed = missed_question_ids(db, user.id, subject, grade)
+    
+    question_ids = question_index.sample(subject, grade, count, prefer=missed)
+    questions = {q.id: q for q in db.query(Question).filter(Question.id.in_(question_ids))}
+    return [questions[question_id] for question_id in question_ids if question_id in questions]
+
+def missed_question_ids(db: Session, user_id: int, subject: str, grade: int) -> set[int]:
+    """Questions of this subject and grade the user has answered wrong (either storage format)"""
+    quiz_ids = question_index.quiz_ids(subject, grade)
+    if not quiz_ids:
+        return set()
+    
+    missed = {
+        question_id for (question_id,) in
+        db.query(UserAnswer.question_id).filter(
+            UserAnswer.user_id == user_id,
+            UserAnswer.quiz_id.in_(quiz_ids),
+            UserAnswer.is_correct == False
+        )
+    }
+    attempts = db.query(
+        QuizAttempt.quiz_id, QuizAttempt.question_count,
+        QuizAttempt.answers, QuizAttempt.answered, QuizAttempt.correct
+    ).filter(QuizAttempt.user_id == user_id, QuizAttempt.quiz_id.in_(quiz_ids))
+    for attempt in attempts:
+        for question_id, answer, is_correct in decode_attempt(attempt, question_index.quiz_question_ids(attempt.quiz_id)):
+            if answer is not None and not is_correct:
+                missed.add(question_id)
+    return missed
+
 
 @router.get("/{quiz_id}", response_model=QuizWithQuestions)
-def get_quiz_with_questions(quiz_id: int, db: Session = Depends(get_db)):
+def get_quiz_with_questions(quiz_id: int, db: Session = Depends(get_read_db)):
     """Get specific quiz with all questions"""
     quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
     if not quiz:
@@ -64,6 +165,7 @@ def add_question(question: QuestionCreate, db: Session = Depends(get_db)):
     """Add question to a quiz"""
     db_question = Question(**question.dict())
     db.add(db_question)
+    publish(db, Invalidation.QUIZ, db_question.quiz_id)
     db.commit()
     db.refresh(db_question)
     return db_question
@@ -72,34 +174,60 @@ def add_question(question: QuestionCreate, db: Session = Depends(get_db)):
 def submit_quiz(
     quiz_id: int,
     submission: QuizSubmission,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user_dependency),
     db: Session = Depends(get_db)
 ):
-    """Submit quiz answers and calculate score"""
+    """Submit quiz answers and calculate score (retries with the same Idempotency-Key are not saved twice)"""
     user_id = current_user.id
     
-    # Get all questions for this quiz
-    questions = db.query(Question).filter(Question.quiz_id == quiz_id).all()
+    def grade_and_save():
+        # Get all questions for this quiz (in question id order, which packed attempts rely on)
+        answer_key = db.query(Question.id, Question.correct_answer).filter(
+            Question.quiz_id == quiz_id
+        ).order_by(Question.id).all()
+        
+        result = save_submission(db, user_id, quiz_id, answer_key, submission.answers)
+        db.commit()
+        return result
     
+    key = clean_key(idempotency_key or submission.attempt_id)
+    if key is None:
+        return grade_and_save()
+    result, replayed = submissions.run(
+        (user_id, key), {"quiz_id": quiz_id, "answers": submission.answers}, grade_and_save,
+        # Don't hold a pooled connection while waiting for the first attempt
+        before_wait=db.rollback
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+def save_submission(db: Session, user_id: int, quiz_id: int, answer_key: list, submitted: dict) -> dict:
+    """Grade answers against answer_key [(question_id, correct_answer), ...] and add the rows (caller commits)"""
     correct_count = 0
     wrong_count = 0
+    answers = []  # one per question, None if unanswered
     
     # Process each answer
-    for question in questions:
-        user_answer_key = str(question.id)
-        if user_answer_key in submission.answers:
-            user_answer = submission.answers[user_answer_key]
-            is_correct = user_answer.lower() == question.correct_answer.lower()
+    for question_id, correct_answer in answer_key:
+        user_answer_key = str(question_id)
+        answers.append(submitted.get(user_answer_key))
+        if user_answer_key in submitted:
+            user_answer = submitted[user_answer_key]
+            is_correct = user_answer.lower() == correct_answer.lower()
             
-            # Save user answer
-            db_user_answer = UserAnswer(
-                user_id=user_id,
-                quiz_id=quiz_id,
-                question_id=question.id,
-                user_answer=user_answer,
-                is_correct=is_correct
-            )
-            db.add(db_user_answer)
+            # Save user answer (packed attempts store them all in one row below)
+            if not settings.PACKED_ANSWERS:
+                db_user_answer = UserAnswer(
+                    user_id=user_id,
+                    quiz_id=quiz_id,
+                    question_id=question_id,
+                    user_answer=user_answer,
+                    is_correct=is_correct
+                )
+                db.add(db_user_answer)
             
             if is_correct:
                 correct_count += 1
@@ -121,8 +249,28 @@ def submit_quiz(
     )
     
     db.add(progress)
-    db.commit()
-    db.refresh(progress)
+    
+    if settings.PACKED_ANSWERS:
+        db.flush()
+        packed_answers, answered, correct = pack_attempt(
+            [correct_answer for _, correct_answer in answer_key], answers
+        )
+        db.add(QuizAttempt(
+            user_id=user_id,
+            quiz_id=quiz_id,
+            progress_id=progress.id,
+            question_count=len(answer_key),
+            answers=packed_answers,
+            answered=answered,
+            correct=correct
+        ))
+    
+    # Keep the class report aggregates in step with this submission
+    user = db.get(User, user_id)
+    record_result(db, user_id, user.course if user else None, quiz_id, score_percentage, correct_count, total)
+    
+    bump_user_version(db, user_id)
+    publish(db, Invalidation.PROGRESS, user_id)
     
     return {
         "score": score_percentage,
@@ -132,6 +280,48 @@ def submit_quiz(
         "message": f"Quiz submitted! Score: {score_percentage:.2f}%"
     }
 
+@router.get("/{quiz_id}/question-stats")
+def get_question_stats(quiz_id: int, db: Session = Depends(get_read_db)):
+    """Per-question answer counts across all attempts (packed and per-answer rows)"""
+    question_ids = [
+        question_id for (question_id,) in
+        db.query(Question.id).filter(Question.quiz_id == quiz_id).order_by(Question.id)
+    ]
+    
+    attempts = (
+        db.query(QuizAttempt.question_count, QuizAttempt.answers, QuizAttempt.answered, QuizAttempt.correct)
+        .filter(QuizAttempt.quiz_id == quiz_id)
+        .yield_per(1000)
+    )
+    tally = tally_attempts(attempts, len(question_ids))
+    
+    # Older submissions stored one user_answers row per question
+    position = {question_id: i for i, question_id in enumerate(question_ids)}
+    rows = (
+        db.query(UserAnswer.question_id, func.lower(UserAnswer.user_answer), UserAnswer.is_correct, func.count())
+        .filter(UserAnswer.quiz_id == quiz_id)
+        .group_by(UserAnswer.question_id, func.lower(UserAnswer.user_answer), UserAnswer.is_correct)
+    )
+    for question_id, answer, is_correct, count in rows:
+        i = position.get(question_id)
+        if i is None:
+            continue
+        tally["answered"][i] += count
+        if is_correct:
+            tally["correct"][i] += count
+        if answer in OPTIONS:
+            tally[answer][i] += count
+    
+    return [
+        {
+            "question_id": question_id,
+            "answered": tally["answered"][i],
+            "correct": tally["correct"][i],
+            "options": {option: tally[option][i] for option in OPTIONS}
+        }
+        for i, question_id in enumerate(question_ids)
+    ]
+
 @router.delete("/{quiz_id}")
 def delete_quiz(quiz_id: int, db: Session = Depends(get_db)):
     """Delete a quiz and its questions"""
@@ -143,5 +333,6 @@ def delete_quiz(quiz_id: int, db: Session = Depends(get_db)):
     db.query(Question).filter(Question.quiz_id == quiz_id).delete()
     
     db.delete(quiz)
+    publish(db, Invalidation.QUIZ, quiz_id)
     db.commit()
     return {"message": "Quiz deleted successfully"}
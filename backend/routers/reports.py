@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import get_read_db
+from models.quiz import Quiz
+from models.report import QuizCompletion, QuizDailyStats
+from models.user import User
+from utils.reports import summarize, summary_columns
+from utils.security import get_current_reader_dependency
+
+router = APIRouter(
+    prefix="/api/reports",
+    tags=["Reports"],
+    dependencies=[Depends(get_current_reader_dependency)]
+)
+
+def _filter_stats(query, course: Optional[str], days: Optional[int]):
+    if course is not None:
+        query = query.filter(QuizDailyStats.course == course)
+    if days:
+        query = query.filter(QuizDailyStats.day > datetime.utcnow().date() - timedelta(days=days))
+    return query
+
+def _students(db: Session, course: Optional[str]) -> int:
+    query = db.query(func.count(User.id))
+    if course is not None:
+        query = query.filter(User.course == course)
+    return query.scalar() or 0
+
+def _completion(completed: int, students: int) -> dict:
+    return {
+        "students": students,
+        "completed": completed,
+        "completion_rate": round(completed / students * 100, 2) if students else 0
+    }
+
+@router.get("/quiz/{quiz_id}")
+def get_quiz_report(
+    quiz_id: int,
+    course: Optional[str] = Query(None, description="Only students of this course"),
+    days: Optional[int] = Query(None, ge=1, description="Only the last N days"),
+    db: Session = Depends(get_read_db)
+):
+    """Class average, score distribution, completion rate and daily trend for one quiz"""
+    quiz = db.query(Quiz.id, Quiz.title, Quiz.subject, Quiz.grade).filter(Quiz.id == quiz_id).first()
+    if not quiz:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
+
+    totals = _filter_stats(
+        db.query(*summary_columns()).filter(QuizDailyStats.quiz_id == quiz_id), course, days
+    ).one()
+    daily = _filter_stats(
+        db.query(
+            QuizDailyStats.day,
+            func.sum(QuizDailyStats.attempts),
+            func.sum(QuizDailyStats.score_sum)
+        ).filter(QuizDailyStats.quiz_id == quiz_id),
+        course, days
+    ).group_by(QuizDailyStats.day).order_by(QuizDailyStats.day).all()
+
+    completed = db.query(func.count(QuizCompletion.user_id)).filter(QuizCompletion.quiz_id == quiz_id)
+    if course is not None:
+        completed = completed.filter(QuizCompletion.course == course)
+
+    return {
+        "quiz_id": quiz.id,
+        "title": quiz.title,
+        "subject": quiz.subject,
+        "grade": quiz.grade,
+        "course": course,
+        **summarize(totals),
+        **_completion(completed.scalar() or 0, _students(db, course)),
+        "daily": [
+            {"day": day.isoformat(), "attempts": attempts, "average_score": round(score_sum / attempts, 2)}
+            for day, attempts, score_sum in daily if attempts
+        ]
+    }
+
+@router.get("/subject/{subject}")
+def get_subject_report(
+    subject: str,
+    course: Optional[str] = Query(None, description="Only students of this course"),
+    grade: Optional[int] = None,
+    days: Optional[int] = Query(None, ge=1, description="Only the last N days"),
+    db: Session = Depends(get_read_db)
+):
+    """Class results across every quiz of a subject, overall and per quiz"""
+    quizzes_query = db.query(Quiz.id, Quiz.title, Quiz.grade).filter(func.lower(Quiz.subject) == subject.strip().lower())
+    if grade is not None:
+        quizzes_query = quizzes_query.filter(Quiz.grade == grade)
+    quizzes = quizzes_query.order_by(Quiz.id).all()
+    if not quizzes:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No quizzes for this subject")
+    quiz_ids = [quiz.id for quiz in quizzes]
+
+    totals = _filter_stats(
+        db.query(*summary_columns()).filter(QuizDailyStats.quiz_id.in_(quiz_ids)), course, days
+    ).one()
+    per_quiz = {
+        row.quiz_id: row for row in _filter_stats(
+            db.query(QuizDailyStats.quiz_id, *summary_columns()).filter(QuizDailyStats.quiz_id.in_(quiz_ids)),
+            course, days
+        ).group_by(QuizDailyStats.quiz_id)
+    }
+    completed_query = (
+        db.query(QuizCompletion.quiz_id, func.count(QuizCompletion.user_id))
+        .filter(QuizCompletion.quiz_id.in_(quiz_ids))
+    )
+    if course is not None:
+        completed_query = completed_query.filter(QuizCompletion.course == course)
+    completed = dict(completed_query.group_by(QuizCompletion.quiz_id).all())
+    students = _students(db, course)
+
+    quiz_reports = []
+    for quiz in quizzes:
+        row = per_quiz.get(quiz.id)
+        quiz_reports.append({
+            "quiz_id": quiz.id,
+            "title": quiz.title,
+            "grade": quiz.grade,
+            "attempts": row.attempts if row else 0,
+            "average_score": round(row.score_sum / row.attempts, 2) if row and row.attempts else 0,
+            **_completion(completed.get(quiz.id, 0), students)
+        })
+
+    return {
+        "subject": subject,
+        "course": course,
+        "grade": grade,
+        "students": students,
+        **summarize(totals),
+        "quizzes": quiz_reports
+    }
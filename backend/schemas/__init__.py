@@ -2,9 +2,11 @@
 from .user import UserCreate, UserResponse, Token, TokenData
 from .quiz import QuizCreate, QuizResponse, QuestionCreate, QuestionResponse, QuizWithQuestions
 from .progress import ProgressResponse, QuizSubmission
+from .dashboard import DashboardResponse
 
 __all__ = [
     "UserCreate", "UserResponse", "Token", "TokenData",
     "QuizCreate", "QuizResponse", "QuestionCreate", "QuestionResponse", "QuizWithQuestions",
-    "ProgressResponse", "QuizSubmission"
+    "ProgressResponse", "QuizSubmission",
+    "DashboardResponse"
 ]
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from .user import UserResponse
+from .progress import ProgressResponse
+from .quiz import QuizResponse
+
+class DashboardResponse(BaseModel):
+    user: Optional[UserResponse] = None
+    stats: Optional[dict] = None
+    progress: Optional[List[ProgressResponse]] = None
+    quizzes: Optional[List[QuizResponse]] = None
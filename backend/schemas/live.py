@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class LiveSessionCreate(BaseModel):
+    quiz_id: int
+
+class LiveNextQuestion(BaseModel):
+    seconds: Optional[int] = None  # time limit for this question
+
+class LiveSessionResponse(BaseModel):
+    code: str
+    quiz_id: int
+    title: str
+    total_questions: int
+    current: int
+    participants: int
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 class ProgressResponse(BaseModel):
     id: int
@@ -17,3 +18,4 @@ class ProgressResponse(BaseModel):
 class QuizSubmission(BaseModel):
     quiz_id: int
     answers: dict  # {question_id: "a", question_id: "b", ...}
+    attempt_id: Optional[str] = None  # client-generated; same as sending it as Idempotency-Key
@@ -0,0 +1,247 @@
+"""Admission control: bounded concurrency and queueing per class of route.
+
+Every HTTP request is put in a class (critical, submit, write, browse, heavy).
+A class may run at most `limit` requests at once. All classes except critical
+also share ADMISSION_MAX_CONCURRENT slots, sized to what the database pool can
+serve. When no slot is free, the request queues. Freed slots go to the waiting
+request of the most important class (submit before write before browse before
+heavy), first come first served within a class.
+
+A request is turned away with 503 + Retry-After instead of queueing when its
+class queue is full or its expected wait already exceeds the class deadline.
+It is also turned away if it is still waiting when the deadline passes. Slots
+are held until the response body has been sent, so streaming exports count
+for as long as they stream. WebSockets pass through untouched.
+"""
+import asyncio
+import itertools
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+from fastapi.responses import JSONResponse
+from config import settings
+
+SERVICE_TIME_SMOOTHING = 0.2  # weight of the newest sample in the moving average
+
+
+@dataclass
+class RouteClass:
+    name: str
+    priority: int            # lower is served first
+    limit: int               # requests of this class running at once
+    max_wait: float          # seconds a request may queue before it is rejected
+    max_queue: int           # requests of this class allowed to queue
+    shared: bool = True      # counts against ADMISSION_MAX_CONCURRENT
+    active: int = 0
+    waiting: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    wait_total: float = 0.0
+    service_time: float = 0.05
+    waiters: list = field(default_factory=list)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self.wait_total / self.admitted * 1000, 2) if self.admitted else 0,
+            "avg_service_ms": round(self.service_time * 1000, 2),
+            "max_wait_ms": int(self.max_wait * 1000)
+        }
+
+
+def default_classes() -> dict[str, RouteClass]:
+    return {
+        route_class.name: route_class for route_class in [
+            RouteClass("critical", priority=0, limit=32, max_wait=1, max_queue=64, shared=False),
+            RouteClass("submit", priority=1, limit=8, max_wait=10, max_queue=200),
+            RouteClass("write", priority=2, limit=4, max_wait=5, max_queue=50),
+            RouteClass("browse", priority=3, limit=6, max_wait=2, max_queue=100),
+            RouteClass("heavy", priority=4, limit=2, max_wait=5, max_queue=4),
+        ]
+    }
+
+
+CRITICAL_PATHS = {"/", "/health", "/api/auth/me", "/api/admin/admission"}
+HEAVY_PREFIXES = ("/api/export", "/api/admin/export", "/api/reports/", "/api/admin/reports/")
+
+
+def classify(method: str, path: str) -> str:
+    if path in CRITICAL_PATHS or method == "OPTIONS":
+        return "critical"
+    if method == "POST" and (
+        path.startswith("/api/quiz/submit/") or (path.startswith("/api/live/") and path.endswith("/end"))
+    ):
+        return "submit"
+    if path.startswith(HEAVY_PREFIXES):
+        return "heavy"
+    if method in ("GET", "HEAD"):
+        return "browse"
+    return "write"
+
+
+class Rejected(Exception):
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int, classes: Optional[dict[str, RouteClass]] = None):
+        self.max_concurrent = max_concurrent
+        self.classes = classes or default_classes()
+        self.shared_active = 0
+        self._order = itertools.count()
+
+    def _has_room(self, route_class: RouteClass) -> bool:
+        if route_class.active >= route_class.limit:
+            return False
+        return not route_class.shared or self.shared_active < self.max_concurrent
+
+    def _take(self, route_class: RouteClass):
+        route_class.active += 1
+        if route_class.shared:
+            self.shared_active += 1
+
+    def _more_urgent_waiting(self, route_class: RouteClass) -> bool:
+        if not route_class.shared:
+            return bool(route_class.waiters)
+        # Only waiters that could take the slot we'd use count (not ones blocked by their own class limit)
+        return any(
+            c.waiters and c.active < c.limit for c in self.classes.values()
+            if c.shared and c.priority <= route_class.priority
+        )
+
+    def _expected_wait(self, route_class: RouteClass) -> float:
+        ahead = sum(
+            c.waiting for c in self.classes.values()
+            if c is route_class or (route_class.shared and c.shared and c.priority < route_class.priority)
+        )
+        return route_class.service_time * (ahead + 1) / max(route_class.limit, 1)
+
+    async def acquire(self, name: str) -> float:
+        """Wait for a slot of class `name`; returns when it was granted or raises Rejected"""
+        route_class = self.classes[name]
+        arrived = time.monotonic()
+        if self._has_room(route_class) and not self._more_urgent_waiting(route_class):
+            self._take(route_class)
+            route_class.admitted += 1
+            return arrived
+
+        expected = self._expected_wait(route_class)
+        if route_class.waiting >= route_class.max_queue or expected > route_class.max_wait:
+            route_class.rejected += 1
+            raise Rejected(expected)
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (next(self._order), future)
+        route_class.waiters.append(waiter)
+        route_class.waiting += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=route_class.max_wait)
+        except asyncio.TimeoutError:
+            if future.done():
+                # Granted just as the deadline passed: keep the slot
+                pass
+            else:
+                future.cancel()
+                route_class.timed_out += 1
+                raise Rejected(self._expected_wait(route_class))
+        except asyncio.CancelledError:
+            # Client went away while queued
+            if future.done() and not future.cancelled():
+                self.release(name, arrived)
+            else:
+                future.cancel()
+            raise
+        finally:
+            if waiter in route_class.waiters:
+                route_class.waiters.remove(waiter)
+                route_class.waiting -= 1
+        granted = time.monotonic()
+        route_class.admitted += 1
+        route_class.wait_total += granted - arrived
+        return granted
+
+    def release(self, name: str, granted: float):
+        route_class = self.classes[name]
+        route_class.active -= 1
+        if route_class.shared:
+            self.shared_active -= 1
+        elapsed = time.monotonic() - granted
+        route_class.service_time += SERVICE_TIME_SMOOTHING * (elapsed - route_class.service_time)
+        self._wake()
+
+    def _wake(self):
+        """Hand freed slots to waiters, most important class first"""
+        for route_class in sorted(self.classes.values(), key=lambda c: c.priority):
+            while route_class.waiters and self._has_room(route_class):
+                waiter = route_class.waiters.pop(0)
+                route_class.waiting -= 1
+                future = waiter[1]
+                if future.done():
+                    continue
+                self._take(route_class)
+                future.set_result(None)
+            if route_class.shared and route_class.waiters and self.shared_active >= self.max_concurrent:
+                # Don't let a less important class jump the queue
+                break
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "shared_active": self.shared_active,
+            "classes": {name: c.stats() for name, c in self.classes.items()}
+        }
+
+
+controller = AdmissionController(settings.ADMISSION_MAX_CONCURRENT)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying `controller` to every HTTP request"""
+
+    def __init__(self, app, controller: AdmissionController = controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.controller.max_concurrent <= 0:
+            await self.app(scope, receive, send)
+            return
+        name = classify(scope["method"], scope["path"])
+        try:
+            granted = await self.controller.acquire(name)
+        except Rejected as rejected:
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry shortly"},
+                status_code=503,
+                headers={"Retry-After": str(max(1, math.ceil(rejected.retry_after)))}
+            )
+            await response(scope, receive, send)
+            return
+
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.controller.release(name, granted)
+
+        async def send_and_release(message):
+            try:
+                await send(message)
+            finally:
+                if message["type"] == "http.response.body" and not message.get("more_body", False):
+                    release()
+
+        try:
+            await self.app(scope, receive, send_and_release)
+        finally:
+            release()
@@ -0,0 +1,59 @@
+import hashlib
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+from config import settings
+from database import dialect_insert, get_read_db
+from models.user import User
+from models.user_version import UserVersion
+from utils.security import get_current_reader_dependency
+
+
+def bump_user_version(db: Session, user_id: int):
+    """Mark a user's notes/progress/profile as changed (call before the write commits)"""
+    stmt = dialect_insert(db)(UserVersion).values(user_id=user_id, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserVersion.user_id],
+        set_={"version": UserVersion.version + 1}
+    )
+    db.execute(stmt)
+
+
+def get_user_version(db: Session, user_id: int) -> int:
+    """Current resource version for a user (0 if they never wrote anything)"""
+    version = db.query(UserVersion.version).filter(UserVersion.user_id == user_id).scalar()
+    return version or 0
+
+
+def make_etag(request: Request, user_id: int, version: int) -> str:
+    """Strong ETag for this URL as seen by this user at this version"""
+    key = f"{settings.APP_VERSION}:{user_id}:{version}:{request.url.path}?{request.url.query}"
+    return '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison as required for If-None-Match"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def check_user_etag(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_reader_dependency),
+    db: Session = Depends(get_read_db)
+):
+    """Dependency for per-user GETs: answers 304 before the handler runs its query.
+
+    The version is read on the handler's own (cached) read session, before the body,
+    so a lagging replica can only produce an ETag older than the data, never newer.
+    """
+    etag = make_etag(request, current_user.id, get_user_version(db, current_user.id))
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
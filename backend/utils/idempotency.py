@@ -0,0 +1,119 @@
+"""Duplicate suppression for retried writes (Idempotency-Key).
+
+The first request with a given (user, key) runs; its result is kept for
+IDEMPOTENCY_TTL_SECONDS and returned to every retry without running the handler
+again. A retry that arrives while the first is still running waits for it instead
+of running alongside. If the first attempt fails nothing is stored, so the next
+retry runs for real. Reusing a key with a different request body is refused.
+
+The store is an in-memory LRU bounded to IDEMPOTENCY_MAX_KEYS per worker, so
+retries are only recognised by the worker that saw the first attempt.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+from fastapi import HTTPException, status
+from config import settings
+
+WAIT_FOR_FIRST_SECONDS = 30
+
+
+class _Entry:
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+        self.expires = None
+
+
+class IdempotencyStore:
+    def __init__(self, max_keys: int, ttl_seconds: int):
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(payload) -> str:
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _evict(self, now: float):
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            expired = entry.expires is not None and entry.expires < now
+            if not expired and len(self._entries) <= self.max_keys:
+                break
+            del self._entries[key]
+
+    def run(self, key: tuple, payload, handler: Callable[[], dict],
+            before_wait: Optional[Callable[[], None]] = None) -> tuple[dict, bool]:
+        """(result, replayed): handler's result, run at most once per key while it is remembered.
+
+        before_wait runs before blocking on a duplicate in flight, e.g. to hand the
+        caller's database connection back to the pool while it waits.
+        """
+        fingerprint = self.fingerprint(payload)
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.expires is not None and entry.expires < now:
+                    del self._entries[key]
+                    entry = None
+                if entry is None:
+                    entry = _Entry(fingerprint)
+                    self._entries[key] = entry
+                    self._evict(now)
+                    break
+                self._entries.move_to_end(key)
+            if entry.fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used for a different request"
+                )
+            # Another request with this key is running or has finished: wait for its outcome
+            if not entry.done.is_set() and before_wait is not None:
+                before_wait()
+            if not entry.done.wait(WAIT_FOR_FIRST_SECONDS):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still being processed",
+                    headers={"Retry-After": "1"}
+                )
+            if not entry.failed:
+                return entry.result, True
+            # The first attempt failed and was forgotten; loop to run this one ourselves
+
+        try:
+            result = handler()
+        except BaseException:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            entry.failed = True
+            entry.done.set()
+            raise
+        entry.result = result
+        entry.expires = time.monotonic() + self.ttl_seconds
+        entry.done.set()
+        return result, False
+
+
+def clean_key(key: Optional[str]) -> Optional[str]:
+    """Validated Idempotency-Key / attempt id (None if not given)"""
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > 255:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Idempotency-Key must be 1-255 characters"
+        )
+    return key
+
+
+submissions = IdempotencyStore(settings.IDEMPOTENCY_MAX_KEYS, settings.IDEMPOTENCY_TTL_SECONDS)
@@ -0,0 +1,204 @@
+"""Cross-worker cache invalidation over Postgres LISTEN/NOTIFY.
+
+Write paths call publish(db, kind, key) before committing. The NOTIFY is part of
+the transaction, so other workers only hear about committed changes; this worker
+dispatches its own events right after the commit. Caches register with
+subscribe(kind, callback). A callback receives the changed key, or None meaning
+"drop everything of this kind" (sent after the listener reconnects, since events
+may have been missed while it was down).
+
+SQLite has no NOTIFY, so there publish() bumps the kind's row in
+invalidation_versions instead, in the same transaction. Every worker polls that
+table every SQLITE_INVALIDATION_POLL_MS and drops everything of a kind whose
+version moved, so other workers' caches lag a commit by at most one poll.
+"""
+import json
+import select
+import threading
+import uuid
+from collections import defaultdict
+from enum import Enum
+from typing import Callable, Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from database import engine, ENGINE_OPTIONS, dialect_insert
+from config import settings
+from models.invalidation_version import InvalidationVersion
+
+CHANNEL = "msl_invalidate"
+
+
+class Invalidation(str, Enum):
+    QUIZ = "quiz"          # a quiz or its questions changed (key: quiz id)
+    USER = "user"          # profile changed or account deleted (key: user id)
+    NOTES = "notes"        # a user's notes changed (key: user id)
+    PROGRESS = "progress"  # a user submitted a quiz (key: user id)
+
+
+_worker_id = uuid.uuid4().hex
+_subscribers: dict[Invalidation, list[Callable[[Optional[int]], None]]] = defaultdict(list)
+# SQLite: last invalidation_versions value this worker has acted on, per kind
+_versions: dict[str, int] = {}
+_versions_lock = threading.Lock()
+
+
+def subscribe(kind: Invalidation, callback: Callable[[Optional[int]], None]):
+    """Call callback(key) whenever an invalidation of this kind is committed anywhere"""
+    _subscribers[kind].append(callback)
+
+
+def publish(db: Session, kind: Invalidation, key: Optional[int] = None):
+    """Queue an invalidation that fires when db's transaction commits"""
+    db.info.setdefault("invalidations", []).append((kind, key))
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        payload = json.dumps({"worker": _worker_id, "kind": kind.value, "key": key})
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+    elif dialect == "sqlite":
+        stmt = (
+            dialect_insert(db)(InvalidationVersion)
+            .values(kind=kind.value, version=1)
+            .on_conflict_do_update(
+                index_elements=[InvalidationVersion.kind],
+                set_={"version": InvalidationVersion.version + 1}
+            )
+            .returning(InvalidationVersion.version)
+        )
+        db.info.setdefault("invalidation_versions", {})[kind.value] = db.execute(stmt).scalar_one()
+
+
+def _dispatch(kind: Invalidation, key: Optional[int]):
+    for callback in _subscribers[kind]:
+        try:
+            callback(key)
+        except Exception as e:
+            print(f"[invalidation] {kind.value} subscriber failed: {e}")
+
+
+def _dispatch_all():
+    for kind in Invalidation:
+        _dispatch(kind, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_after_commit(session: Session):
+    with _versions_lock:
+        for kind, version in session.info.pop("invalidation_versions", {}).items():
+            # Our own bump needs no second dispatch from the poller, unless it skipped someone else's
+            if _versions.get(kind) == version - 1:
+                _versions[kind] = version
+    for kind, key in session.info.pop("invalidations", []):
+        _dispatch(kind, key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session):
+    session.info.pop("invalidations", None)
+    session.info.pop("invalidation_versions", None)
+
+
+class InvalidationListener(threading.Thread):
+    """Background thread that LISTENs on a dedicated connection and dispatches other workers' events"""
+
+    def __init__(self):
+        super().__init__(name="invalidation-listener", daemon=True)
+        self._stop_event = threading.Event()
+        self._engine = create_engine(
+            engine.url,
+            poolclass=NullPool,
+            connect_args=ENGINE_OPTIONS["connect_args"]
+        )
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                print(f"[invalidation] listener connection lost: {e}")
+                self._stop_event.wait(5)
+
+    def _listen(self):
+        connection = self._engine.raw_connection()
+        try:
+            pg = connection.driver_connection
+            pg.autocommit = True
+            pg.cursor().execute(f"LISTEN {CHANNEL}")
+            # Anything committed while we were not listening is unknown: start clean
+            _dispatch_all()
+            while not self._stop_event.is_set():
+                if select.select([pg], [], [], 5) == ([], [], []):
+                    continue
+                pg.poll()
+                while pg.notifies:
+                    self._handle(pg.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+    def _handle(self, payload: str):
+        try:
+            message = json.loads(payload)
+            kind = Invalidation(message["kind"])
+        except (ValueError, KeyError) as e:
+            print(f"[invalidation] ignoring bad payload {payload!r}: {e}")
+            return
+        if message.get("worker") != _worker_id:
+            _dispatch(kind, message.get("key"))
+
+
+class InvalidationPoller(InvalidationListener):
+    """SQLite stand-in for the listener: polls invalidation_versions and dispatches kinds that moved"""
+
+    def __init__(self):
+        super().__init__()
+        self.name = "invalidation-poller"
+
+    def _listen(self):
+        connection = self._engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            while not self._stop_event.is_set():
+                cursor.execute("SELECT kind, version FROM invalidation_versions")
+                self._handle_versions(cursor.fetchall())
+                self._stop_event.wait(settings.SQLITE_INVALIDATION_POLL_MS / 1000)
+        finally:
+            connection.close()
+
+    def _handle_versions(self, rows):
+        changed = []
+        with _versions_lock:
+            for kind, version in rows:
+                if _versions.get(kind) != version:
+                    _versions[kind] = version
+                    changed.append(kind)
+        for kind in changed:
+            try:
+                _dispatch(Invalidation(kind), None)
+            except ValueError:
+                print(f"[invalidation] ignoring unknown kind {kind!r}")
+
+
+_listener: Optional[InvalidationListener] = None
+
+
+def start_listener():
+    """Start this worker's listener (a poller on SQLite)"""
+    global _listener
+    if _listener is None:
+        if engine.dialect.name == "postgresql":
+            _listener = InvalidationListener()
+        elif engine.dialect.name == "sqlite":
+            _listener = InvalidationPoller()
+        else:
+            return
+        _listener.start()
+
+
+def stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
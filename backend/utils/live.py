@@ -0,0 +1,203 @@
+"""State and fan-out for live classroom quizzes.
+
+A LiveSession lives in the memory of the worker that created it, so every socket of
+one session must reach that worker (sticky routing when running several).
+
+Fan-out: every outgoing message is serialized to JSON once and the same string is
+queued for each socket. Each socket has its own small send queue drained by its
+own task, so one slow phone can't hold up the rest of the class; a socket whose
+queue overflows is dropped. Live results are pushed at most every
+RESULTS_INTERVAL_SECONDS however fast answers stream in.
+"""
+import asyncio
+import json
+import secrets
+import time
+from typing import Optional
+from fastapi import WebSocket
+
+RESULTS_INTERVAL_SECONDS = 0.5
+SEND_QUEUE_SIZE = 64
+SESSION_IDLE_SECONDS = 3 * 60 * 60
+
+
+class Participant:
+    def __init__(self, user_id: int, name: str, websocket: WebSocket, is_host: bool = False):
+        self.user_id = user_id
+        self.name = name
+        self.websocket = websocket
+        self.is_host = is_host
+        self.connected = True
+        self.answers: dict[str, str] = {}  # question id (as submitted to /submit) -> answer
+        self.correct = 0
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.sender = asyncio.create_task(self._send_loop())
+
+    async def _send_loop(self):
+        while True:
+            text = await self.queue.get()
+            if text is None:
+                break
+            try:
+                await self.websocket.send_text(text)
+            except Exception:
+                break
+
+    def send(self, text: str) -> bool:
+        """Queue an already serialized message; False if this socket can't keep up"""
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def close(self, code: int = 1000):
+        self.connected = False
+        self.sender.cancel()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+
+class LiveSession:
+    def __init__(self, quiz_id: int, title: str, host_id: int, questions: list[dict], answer_key: list[tuple[int, str]]):
+        self.code = secrets.token_hex(3).upper()
+        self.quiz_id = quiz_id
+        self.title = title
+        self.host_id = host_id
+        self.questions = questions          # what students see (no correct answers)
+        self.answer_key = answer_key        # [(question_id, correct_answer)] in question order
+        self._correct = {question_id: answer.lower() for question_id, answer in answer_key}
+        self.participants: dict[int, Participant] = {}
+        self.current = -1
+        self.ends_at: Optional[float] = None
+        self.tallies = {
+            question["id"]: {"answered": 0, "correct": 0, "options": {"a": 0, "b": 0, "c": 0, "d": 0}}
+            for question in questions
+        }
+        self.ended = False
+        self.last_activity = time.time()
+        self._results_dirty = False
+        self._results_task = asyncio.create_task(self._results_loop())
+
+    # --- fan-out ---
+
+    def broadcast(self, message: dict):
+        text = json.dumps(message)  # serialized once for every socket
+        for participant in list(self.participants.values()):
+            if participant.connected and not participant.send(text):
+                self.drop(participant, code=1013)
+
+    def drop(self, participant: Participant, code: int = 1000):
+        """Close a socket; the participant's answers stay for the final results"""
+        if participant.connected:
+            participant.connected = False
+            asyncio.create_task(participant.close(code))
+
+    def connected_students(self) -> int:
+        return sum(1 for p in self.participants.values() if p.connected and not p.is_host)
+
+    async def _results_loop(self):
+        while not self.ended:
+            await asyncio.sleep(RESULTS_INTERVAL_SECONDS)
+            if self._results_dirty:
+                self._results_dirty = False
+                self.broadcast(self.results_message())
+
+    # --- quiz flow ---
+
+    def join(self, participant: Participant):
+        old = self.participants.get(participant.user_id)
+        if old is not None:
+            # Reconnect: keep the answers, replace the socket
+            participant.answers, participant.correct = old.answers, old.correct
+            self.drop(old)
+        self.participants[participant.user_id] = participant
+        self.last_activity = time.time()
+        if self.current >= 0:
+            participant.send(json.dumps(self.question_message()))
+
+    def current_question(self) -> Optional[dict]:
+        return self.questions[self.current] if 0 <= self.current < len(self.questions) else None
+
+    def question_message(self) -> dict:
+        return {
+            "type": "question",
+            "index": self.current,
+            "total": len(self.questions),
+            "question": self.current_question(),
+            "ends_at": self.ends_at
+        }
+
+    def results_message(self) -> dict:
+        question = self.current_question()
+        return {
+            "type": "results",
+            "question_id": question["id"] if question else None,
+            "participants": self.connected_students(),
+            **(self.tallies[question["id"]] if question else {})
+        }
+
+    def next_question(self, seconds: Optional[int] = None) -> bool:
+        """Move everyone to the next question; False when there are no more"""
+        if self.current + 1 >= len(self.questions):
+            return False
+        self.current += 1
+        self.ends_at = time.time() + seconds if seconds else None
+        self.last_activity = time.time()
+        self.broadcast(self.question_message())
+        return True
+
+    def answer(self, participant: Participant, question_id: int, answer: str) -> bool:
+        """Grade one answer to the current question; False if it is late, repeated or not allowed"""
+        question = self.current_question()
+        if participant.is_host or self.ended or question is None or question["id"] != question_id:
+            return False
+        if self.ends_at is not None and time.time() > self.ends_at:
+            return False
+        if str(question_id) in participant.answers:
+            return False
+        answer = str(answer).strip().lower()
+        participant.answers[str(question_id)] = answer
+        tally = self.tallies[question_id]
+        tally["answered"] += 1
+        if answer in tally["options"]:
+            tally["options"][answer] += 1
+        if answer == self._correct[question_id]:
+            tally["correct"] += 1
+            participant.correct += 1
+        self._results_dirty = True
+        self.last_activity = time.time()
+        return True
+
+    def leaderboard(self, limit: int = 10) -> list[dict]:
+        students = [p for p in self.participants.values() if not p.is_host]
+        students.sort(key=lambda p: p.correct, reverse=True)
+        return [{"name": p.name, "correct": p.correct} for p in students[:limit]]
+
+    async def end(self):
+        self.ended = True
+        self._results_task.cancel()
+        self.broadcast({"type": "end", "leaderboard": self.leaderboard()})
+        for participant in list(self.participants.values()):
+            if not participant.connected:
+                continue
+            # Let the final message drain before closing
+            if participant.send(None):
+                try:
+                    await asyncio.wait_for(participant.sender, timeout=5)
+                except Exception:
+                    pass
+            await participant.close()
+
+
+sessions: dict[str, LiveSession] = {}
+
+
+def add_session(session: LiveSession):
+    now = time.time()
+    for code in [c for c, s in sessions.items() if now - s.last_activity > SESSION_IDLE_SECONDS]:
+        stale = sessions.pop(code)
+        asyncio.create_task(stale.end())
+    sessions[session.code] = session
@@ -0,0 +1,81 @@
+"""Pack a quiz attempt's answers into a few bytes and decode them again.
+
+Questions are addressed by their position in the quiz's question order (ascending
+question id). Options take 2 bits each (a=0 .. d=3, four questions per byte); the
+answered and correct flags are plain bitmaps (eight questions per byte). Decoding
+goes a byte at a time through precomputed lookup tables.
+"""
+from typing import Iterable, Optional
+
+OPTIONS = ("a", "b", "c", "d")
+_OPTION_BITS = {option: i for i, option in enumerate(OPTIONS)}
+
+# byte -> the 4 options / 8 flags it holds, lowest bits first
+_BYTE_TO_OPTIONS = [tuple(OPTIONS[(b >> shift) & 0b11] for shift in (0, 2, 4, 6)) for b in range(256)]
+_BYTE_TO_FLAGS = [tuple(bool(b >> shift & 1) for shift in range(8)) for b in range(256)]
+
+
+def pack_attempt(correct_answers: list[str], answers: list[Optional[str]]) -> tuple[bytes, bytes, bytes]:
+    """Pack answers (one per question, None if unanswered) into (answers, answered, correct) bytes.
+
+    Answers outside a-d are stored as unanswered and not correct.
+    """
+    count = len(answers)
+    packed_answers = bytearray((count + 3) // 4)
+    answered = bytearray((count + 7) // 8)
+    correct = bytearray((count + 7) // 8)
+    for i, (answer, key) in enumerate(zip(answers, correct_answers)):
+        option = _OPTION_BITS.get(answer.lower()) if answer else None
+        if option is None:
+            continue
+        packed_answers[i // 4] |= option << (2 * (i % 4))
+        answered[i // 8] |= 1 << (i % 8)
+        if answer.lower() == key.lower():
+            correct[i // 8] |= 1 << (i % 8)
+    return bytes(packed_answers), bytes(answered), bytes(correct)
+
+
+def unpack_options(data: bytes, count: int) -> list[str]:
+    """The option stored for each of the first count questions (meaningless where unanswered)"""
+    options = []
+    for b in data:
+        options.extend(_BYTE_TO_OPTIONS[b])
+    return options[:count]
+
+
+def unpack_flags(data: bytes, count: int) -> list[bool]:
+    """The first count bits of a bitmap"""
+    flags = []
+    for b in data:
+        flags.extend(_BYTE_TO_FLAGS[b])
+    return flags[:count]
+
+
+def decode_attempt(attempt, question_ids: list[int]) -> list[tuple[int, Optional[str], bool]]:
+    """(question_id, answer or None, is_correct) for every question in the attempt"""
+    count = min(attempt.question_count, len(question_ids))
+    options = unpack_options(attempt.answers, count)
+    answered = unpack_flags(attempt.answered, count)
+    correct = unpack_flags(attempt.correct, count)
+    return [
+        (question_ids[i], options[i] if answered[i] else None, correct[i])
+        for i in range(count)
+    ]
+
+
+def tally_attempts(attempts: Iterable, question_count: int) -> dict[str, list[int]]:
+    """Per-question counts over many attempts: answered, correct and each option"""
+    tally = {"answered": [0] * question_count, "correct": [0] * question_count}
+    tally.update({option: [0] * question_count for option in OPTIONS})
+    for attempt in attempts:
+        count = min(attempt.question_count, question_count)
+        options = unpack_options(attempt.answers, count)
+        answered = unpack_flags(attempt.answered, count)
+        correct = unpack_flags(attempt.correct, count)
+        for i in range(count):
+            if answered[i]:
+                tally["answered"][i] += 1
+                tally[options[i]][i] += 1
+                if correct[i]:
+                    tally["correct"][i] += 1
+    return tally
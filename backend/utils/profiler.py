@@ -0,0 +1,319 @@
+"""Sampling profiler for finding where time goes inside an endpoint.
+
+Both modes snapshot every thread's stack with sys._current_frames() on a timer and
+keep only stacks that are running an endpoint or one of its dependencies, cut to
+start at that frame. Output is the "collapsed stack" text used by flamegraph.pl and
+speedscope: one "frame;frame;frame count" line per distinct stack.
+
+- On demand: a request carrying the admin token in X-Profile (or an expiring ?profile=
+  signature from profile_signature()) is sampled while it runs; the profile is
+  kept in memory and its id returned in the X-Profile-Id response header. Only
+  threads currently running this request are sampled: the profile is put in a
+  context variable, and each thread's stack is matched to the request through
+  the contextvars.Context the threadpool worker (or event loop callback) runs.
+- Continuous: with PROFILER_SAMPLE_INTERVAL_MS > 0 a background thread samples
+  all the time and aggregates stacks per route.
+
+Nothing is sampled and no thread runs unless one of these is switched on.
+"""
+import contextvars
+import hashlib
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from typing import Optional
+from fastapi import Request
+from starlette.datastructures import MutableHeaders
+from config import settings
+
+REQUEST_SAMPLE_INTERVAL = 0.002
+PROFILE_LINK_SECONDS = 10 * 60  # default lifetime of a ?profile= link
+MAX_STORED_PROFILES = 50
+MAX_STACKS_PER_ROUTE = 2000
+
+_labels: dict = {}
+current_request_profile: contextvars.ContextVar = contextvars.ContextVar("current_request_profile", default=None)
+_route_codes_cache: dict[int, tuple[dict, dict]] = {}
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        _labels[code] = label
+    return label
+
+
+def _dependency_calls(dependant):
+    for dependency in dependant.dependencies:
+        if dependency.call is not None:
+            yield dependency.call
+        yield from _dependency_calls(dependency)
+
+
+def _route_label(route) -> str:
+    methods = ",".join(sorted(getattr(route, "methods", None) or ["WS"]))
+    return f"{methods} {route.path}"
+
+
+def route_codes(app) -> tuple[dict, dict]:
+    """Code objects of every endpoint (-> its route label) and of every dependency they use"""
+    cached = _route_codes_cache.get(id(app))
+    if cached:
+        return cached
+    endpoints, dependencies = {}, {}
+    for route in app.routes:
+        code = getattr(getattr(route, "endpoint", None), "__code__", None)
+        if code is None:
+            continue
+        endpoints[code] = _route_label(route)
+        dependant = getattr(route, "dependant", None)
+        if dependant is not None:
+            for call in _dependency_calls(dependant):
+                call_code = getattr(call, "__code__", None)
+                if call_code is not None:
+                    dependencies.setdefault(call_code, "(shared dependencies)")
+    _route_codes_cache[id(app)] = (endpoints, dependencies)
+    return endpoints, dependencies
+
+
+def _outer_frame(frame, root):
+    """Caller of the outermost frame running root's code"""
+    outer = None
+    while frame is not None:
+        if frame.f_code is root:
+            outer = frame
+        frame = frame.f_back
+    return outer.f_back if outer is not None else None
+
+
+def _running_context(frame) -> Optional[contextvars.Context]:
+    """Context the innermost Context.run() on this stack runs in (threadpool worker or event loop callback)"""
+    while frame is not None:
+        code_locals = frame.f_locals
+        for candidate in (code_locals.get("context"), getattr(code_locals.get("self"), "_context", None)):
+            if isinstance(candidate, contextvars.Context):
+                return candidate
+        frame = frame.f_back
+    return None
+
+
+def _collapse(frame, roots) -> Optional[tuple[str, object]]:
+    """(collapsed stack starting at the outermost frame in roots, that root code) or None"""
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    for i, code in enumerate(codes):
+        if code in roots:
+            return ";".join(_label(c) for c in codes[i:]), code
+    return None
+
+
+class _SamplerThread(threading.Thread, ABC):
+    def __init__(self, interval: float, name: str):
+        super().__init__(name=name, daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        me = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != me:
+                    self.sample(frame)
+
+    @abstractmethod
+    def sample(self, frame):
+        """Handle one thread's current stack"""
+
+
+class RequestProfile(_SamplerThread):
+    """Samples the endpoint (and its dependencies) of one request while it runs"""
+
+    def __init__(self, scope: dict):
+        super().__init__(REQUEST_SAMPLE_INTERVAL, "request-profiler")
+        self.id = uuid.uuid4().hex[:12]
+        self.scope = scope
+        self.stacks: Counter = Counter()
+        self._roots: Optional[set] = None
+
+    def sample(self, frame):
+        if self._roots is None:
+            # Routing happens after the middleware starts us; wait until the route is known
+            route = self.scope.get("route")
+            if route is None:
+                return
+            calls = [route.endpoint]
+            dependant = getattr(route, "dependant", None)
+            if dependant is not None:
+                calls.extend(_dependency_calls(dependant))
+            self._roots = {call.__code__ for call in calls if hasattr(call, "__code__")}
+        collapsed = _collapse(frame, self._roots)
+        if not collapsed:
+            return
+        # Shared dependencies (get_db, auth) are roots of every route: keep only our request's threads
+        context = _running_context(_outer_frame(frame, collapsed[1]))
+        if context is not None and context.get(current_request_profile) is self:
+            self.stacks[collapsed[0]] += 1
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+class RouteSampler(_SamplerThread):
+    """Always-on low-frequency sampler aggregating stacks per route"""
+
+    def __init__(self, app, interval: float):
+        super().__init__(interval, "route-profiler")
+        self.app = app
+        self.routes: dict[str, Counter] = {}
+        self._roots: Optional[dict] = None
+
+    def sample(self, frame):
+        if self._roots is None:
+            endpoints, dependencies = route_codes(self.app)
+            self._roots = {**dependencies, **endpoints}
+        collapsed = _collapse(frame, self._roots)
+        if not collapsed:
+            return
+        stack, root = collapsed
+        stacks = self.routes.setdefault(self._roots[root], Counter())
+        if stack in stacks or len(stacks) < MAX_STACKS_PER_ROUTE:
+            stacks[stack] += 1
+
+    def collapsed(self, route: Optional[str] = None) -> str:
+        lines = []
+        for label, stacks in list(self.routes.items()):
+            if route and label != route:
+                continue
+            lines.extend(f"{label};{stack} {count}" for stack, count in stacks.most_common())
+        return "\n".join(lines)
+
+    def summary(self) -> dict:
+        return {label: sum(stacks.values()) for label, stacks in list(self.routes.items())}
+
+    def reset(self):
+        self.routes = {}
+
+
+# --- on-demand profiles ---
+
+_profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+def _sign(path: str, expires: int) -> str:
+    return hmac.new(settings.ADMIN_TOKEN.encode(), f"{path}\n{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def profile_signature(path: str, seconds: int = PROFILE_LINK_SECONDS) -> str:
+    """Value for ?profile= that lets a link profile this path for a while without sharing the admin token"""
+    expires = int(time.time()) + seconds
+    return f"{expires}.{_sign(path, expires)}"
+
+
+def _valid_signature(value: str, path: str) -> bool:
+    expires, _, signature = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _sign(path, int(expires)))
+
+
+def wants_profile(request) -> bool:
+    """True if this request asked (with admin credentials) to be profiled"""
+    if not settings.ADMIN_TOKEN:
+        return False
+    token = request.headers.get("x-profile")
+    if token:
+        return hmac.compare_digest(token, settings.ADMIN_TOKEN)
+    signature = request.query_params.get("profile")
+    if signature:
+        return _valid_signature(signature, request.url.path)
+    return False
+
+
+class ProfileMiddleware:
+    """ASGI middleware sampling the requests that wants_profile() accepts (a pass-through otherwise)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMIN_TOKEN or not wants_profile(Request(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope)
+        finished = False
+
+        def finish():
+            nonlocal finished
+            if not finished:
+                finished = True
+                profile.stop()
+                store_profile(profile)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", profile.id)
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Stored before the client can see the id
+                finish()
+            await send(message)
+
+        token = current_request_profile.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            current_request_profile.reset(token)
+            finish()
+
+
+def store_profile(profile: RequestProfile):
+    with _profiles_lock:
+        _profiles[profile.id] = profile
+        while len(_profiles) > MAX_STORED_PROFILES:
+            _profiles.popitem(last=False)
+
+
+def get_profile(profile_id: str) -> Optional[RequestProfile]:
+    with _profiles_lock:
+        return _profiles.get(profile_id)
+
+
+def list_profiles() -> list[dict]:
+    with _profiles_lock:
+        return [
+            {"id": p.id, "path": p.scope.get("path"), "samples": sum(p.stacks.values())}
+            for p in reversed(_profiles.values())
+        ]
+
+
+# --- continuous sampler ---
+
+route_sampler: Optional[RouteSampler] = None
+
+
+def start_route_sampler(app):
+    global route_sampler
+    if route_sampler is None and settings.PROFILER_SAMPLE_INTERVAL_MS > 0:
+        route_sampler = RouteSampler(app, settings.PROFILER_SAMPLE_INTERVAL_MS / 1000)
+        route_sampler.start()
+
+
+def stop_route_sampler():
+    global route_sampler
+    if route_sampler is not None:
+        route_sampler.stop()
+        route_sampler = None
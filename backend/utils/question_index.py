@@ -0,0 +1,121 @@
+"""In-memory index of question ids per (subject, grade) for random practice sets.
+
+Built with one query the first time it is needed and rebuilt lazily after any
+quiz/question change (via utils.invalidation); one thread rebuilds while the others
+wait for its result. Sampling is random.sample over a compact int array, which
+only touches the k chosen slots, so it stays fast however large the bank is. The
+database never sees ORDER BY random().
+"""
+import random
+import threading
+from array import array
+from typing import Optional
+from database import SessionLocal
+from models.question import Question
+from models.quiz import Quiz
+from utils.invalidation import Invalidation, subscribe
+
+
+class QuestionIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()  # one rebuild at a time; other readers wait for it
+        self._generation = 0
+        self._groups: Optional[dict[tuple[str, int], array]] = None
+        self._group_quizzes: dict[tuple[str, int], list[int]] = {}
+        self._quiz_questions: dict[int, list[int]] = {}
+
+    @staticmethod
+    def key(subject: str, grade: int) -> tuple[str, int]:
+        return (subject.strip().lower(), grade)
+
+    def invalidate(self, quiz_id: Optional[int] = None):
+        with self._lock:
+            self._groups = None
+            self._generation += 1
+
+    def _load(self):
+        generation = self._generation
+        groups: dict[tuple[str, int], array] = {}
+        group_quizzes: dict[tuple[str, int], list[int]] = {}
+        quiz_questions: dict[int, list[int]] = {}
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(Question.id, Question.quiz_id, Quiz.subject, Quiz.grade)
+                .join(Quiz, Quiz.id == Question.quiz_id)
+                .order_by(Question.id)
+                .yield_per(10000)
+            )
+            for question_id, quiz_id, subject, grade in rows:
+                key = self.key(subject or "", grade)
+                if key not in groups:
+                    groups[key] = array("l")
+                    group_quizzes[key] = []
+                groups[key].append(question_id)
+                if quiz_id not in quiz_questions:
+                    quiz_questions[quiz_id] = []
+                    group_quizzes[key].append(quiz_id)
+                quiz_questions[quiz_id].append(question_id)
+        finally:
+            db.close()
+        with self._lock:
+            # A change that landed while loading means this snapshot may be stale: use it once, don't keep it
+            if generation == self._generation:
+                self._groups = groups
+                self._group_quizzes = group_quizzes
+                self._quiz_questions = quiz_questions
+        return groups, group_quizzes, quiz_questions
+
+    def _cached(self):
+        with self._lock:
+            if self._groups is not None:
+                return self._groups, self._group_quizzes, self._quiz_questions
+        return None
+
+    def _snapshot(self):
+        snapshot = self._cached()
+        if snapshot is not None:
+            return snapshot
+        with self._load_lock:
+            # Whoever held the lock before us may have just rebuilt it
+            snapshot = self._cached()
+            if snapshot is not None:
+                return snapshot
+            return self._load()
+
+    def question_ids(self, subject: str, grade: int) -> array:
+        groups, _, _ = self._snapshot()
+        return groups.get(self.key(subject, grade), array("l"))
+
+    def quiz_ids(self, subject: str, grade: int) -> list[int]:
+        _, group_quizzes, _ = self._snapshot()
+        return group_quizzes.get(self.key(subject, grade), [])
+
+    def quiz_question_ids(self, quiz_id: int) -> list[int]:
+        """Question ids of one quiz in id order (the order packed attempts use)"""
+        _, _, quiz_questions = self._snapshot()
+        return quiz_questions.get(quiz_id, [])
+
+    def sample(self, subject: str, grade: int, count: int, prefer: Optional[set[int]] = None, prefer_share: float = 0.5) -> list[int]:
+        """count random question ids for (subject, grade), up to prefer_share of them from prefer"""
+        ids = self.question_ids(subject, grade)
+        count = min(count, len(ids))
+        chosen = []
+        if prefer:
+            preferred = sorted(prefer)
+            chosen = random.sample(preferred, min(len(preferred), int(count * prefer_share)))
+        taken = set(chosen)
+        # Over-draw by the number already chosen so duplicates can be skipped without a second pass
+        for question_id in random.sample(ids, min(len(ids), count + len(chosen))):
+            if len(chosen) >= count:
+                break
+            if question_id not in taken:
+                chosen.append(question_id)
+                taken.add(question_id)
+        random.shuffle(chosen)
+        return chosen
+
+
+question_index = QuestionIndex()
+subscribe(Invalidation.QUIZ, question_index.invalidate)
@@ -0,0 +1,160 @@
+"""Class reports from pre-aggregated tables instead of GROUP BYs over progress.
+
+quiz_daily_stats keeps running totals and a 10-bucket score histogram per
+quiz x course x day; quiz_completions keeps each student's first completion of a
+quiz. Both are upserted in the same transaction as the submission that changes
+them (record_result), so reports only ever sum a handful of small rows.
+
+rebuild_reports() recomputes them from progress, for backfilling existing data
+or repairing drift; with `since` it only redoes the recent days, which is cheap
+enough to run on a schedule.
+"""
+from datetime import date, datetime
+from typing import Optional
+from sqlalchemy import Date, case, func, text
+from sqlalchemy.orm import Session
+from database import dialect_insert
+from models.progress import Progress
+from models.report import SCORE_BUCKETS, QuizCompletion, QuizDailyStats
+from models.user import User
+
+BUCKET_COLUMNS = [getattr(QuizDailyStats, f"bucket_{i}") for i in range(SCORE_BUCKETS)]
+
+
+def score_bucket(score: float) -> int:
+    """Histogram bucket of a 0-100 score (100 goes in the 90-100 bucket)"""
+    return max(0, min(int(score // 10), SCORE_BUCKETS - 1))
+
+
+def record_result(db: Session, user_id: int, course: Optional[str], quiz_id: int,
+                  score: float, correct: int, total: int, completed_at: Optional[datetime] = None):
+    """Add one submission to the report tables (call before the submission commits)"""
+    completed_at = completed_at or datetime.utcnow()
+    course = course or ""
+    insert = dialect_insert(db)
+    bucket = f"bucket_{score_bucket(score)}"
+    stmt = insert(QuizDailyStats).values(
+        quiz_id=quiz_id,
+        course=course,
+        day=completed_at.date(),
+        attempts=1,
+        score_sum=score,
+        correct_sum=correct,
+        question_sum=total,
+        **{column.key: 1 if column.key == bucket else 0 for column in BUCKET_COLUMNS}
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[QuizDailyStats.quiz_id, QuizDailyStats.course, QuizDailyStats.day],
+        set_={
+            "attempts": QuizDailyStats.attempts + 1,
+            "score_sum": QuizDailyStats.score_sum + score,
+            "correct_sum": QuizDailyStats.correct_sum + correct,
+            "question_sum": QuizDailyStats.question_sum + total,
+            bucket: getattr(QuizDailyStats, bucket) + 1
+        }
+    )
+    db.execute(stmt)
+    db.execute(
+        insert(QuizCompletion)
+        .values(quiz_id=quiz_id, user_id=user_id, course=course, completed_at=completed_at)
+        .on_conflict_do_nothing(index_elements=[QuizCompletion.quiz_id, QuizCompletion.user_id])
+    )
+
+
+def rebuild_reports(db: Session, since: Optional[date] = None) -> dict:
+    """Recompute the report tables from progress (all of it, or days >= since); caller commits"""
+    if db.get_bind().dialect.name == "postgresql":
+        # Hold back concurrent record_result() calls so none is counted twice or lost
+        db.execute(text("LOCK TABLE quiz_daily_stats IN EXCLUSIVE MODE"))
+
+    delete = db.query(QuizDailyStats)
+    if since:
+        delete = delete.filter(QuizDailyStats.day >= since)
+    delete.delete(synchronize_session=False)
+
+    day = func.date(Progress.completed_at, type_=Date)
+    course = func.coalesce(User.course, "")
+    bucket = case(
+        *[(Progress.score >= i * 10, i) for i in range(SCORE_BUCKETS - 1, 0, -1)],
+        else_=0
+    )
+    query = (
+        db.query(
+            Progress.quiz_id, course, day, bucket,
+            func.count(Progress.id),
+            func.coalesce(func.sum(Progress.score), 0),
+            func.coalesce(func.sum(Progress.correct_answers), 0),
+            func.coalesce(func.sum(Progress.total_questions), 0)
+        )
+        .join(User, User.id == Progress.user_id)
+        .filter(Progress.quiz_id.isnot(None), Progress.completed_at.isnot(None))
+        .group_by(Progress.quiz_id, course, day, bucket)
+    )
+    if since:
+        query = query.filter(Progress.completed_at >= datetime.combine(since, datetime.min.time()))
+
+    rows: dict[tuple, dict] = {}
+    for quiz_id, row_course, row_day, row_bucket, attempts, score_sum, correct_sum, question_sum in query:
+        key = (quiz_id, row_course, row_day)
+        if key not in rows:
+            rows[key] = {
+                "quiz_id": quiz_id, "course": row_course, "day": row_day,
+                "attempts": 0, "score_sum": 0, "correct_sum": 0, "question_sum": 0,
+                **{column.key: 0 for column in BUCKET_COLUMNS}
+            }
+        stats = rows[key]
+        stats["attempts"] += attempts
+        stats["score_sum"] += score_sum
+        stats["correct_sum"] += correct_sum
+        stats["question_sum"] += question_sum
+        stats[f"bucket_{row_bucket}"] += attempts
+    if rows:
+        db.execute(dialect_insert(db)(QuizDailyStats), list(rows.values()))
+
+    # Completions only ever get added, so a partial rebuild just fills in what is missing
+    completions = (
+        db.query(Progress.quiz_id, Progress.user_id, func.max(User.course), func.min(Progress.completed_at))
+        .join(User, User.id == Progress.user_id)
+        .filter(Progress.quiz_id.isnot(None))
+        .group_by(Progress.quiz_id, Progress.user_id)
+    )
+    if since:
+        completions = completions.filter(Progress.completed_at >= datetime.combine(since, datetime.min.time()))
+    completion_rows = [
+        {"quiz_id": quiz_id, "user_id": user_id, "course": row_course or "", "completed_at": completed_at}
+        for quiz_id, user_id, row_course, completed_at in completions
+    ]
+    if completion_rows:
+        db.execute(
+            dialect_insert(db)(QuizCompletion).on_conflict_do_nothing(
+                index_elements=[QuizCompletion.quiz_id, QuizCompletion.user_id]
+            ),
+            completion_rows
+        )
+    return {"daily_rows": len(rows), "completions_checked": len(completion_rows)}
+
+
+def summarize(rows) -> dict:
+    """attempts / average / accuracy / histogram from summed quiz_daily_stats columns"""
+    attempts = rows.attempts or 0
+    buckets = [getattr(rows, column.key) or 0 for column in BUCKET_COLUMNS]
+    return {
+        "attempts": attempts,
+        "average_score": round(rows.score_sum / attempts, 2) if attempts else 0,
+        "accuracy": round(rows.correct_sum / rows.question_sum * 100, 2) if rows.question_sum else 0,
+        "distribution": [
+            {"range": f"{i * 10}-{i * 10 + 9 if i < SCORE_BUCKETS - 1 else 100}", "count": count}
+            for i, count in enumerate(buckets)
+        ]
+    }
+
+
+def summary_columns():
+    """SUM() of every quiz_daily_stats counter, labelled for summarize()"""
+    return [
+        func.sum(QuizDailyStats.attempts).label("attempts"),
+        func.sum(QuizDailyStats.score_sum).label("score_sum"),
+        func.sum(QuizDailyStats.correct_sum).label("correct_sum"),
+        func.sum(QuizDailyStats.question_sum).label("question_sum"),
+        *[func.sum(column).label(column.key) for column in BUCKET_COLUMNS]
+    ]
@@ -1,3 +1,4 @@
+import hmac
 from fastapi import Depends, Header, HTTPException, status
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
@@ -5,7 +6,7 @@ from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 from typing import Optional
 from config import settings
-from database import get_db
+from database import get_db, get_read_db, use_primary
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -77,9 +78,43 @@ def get_current_user(authorization: Optional[str], db: Session):
     return user
 
 
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """FastAPI dependency for admin-only endpoints (hidden entirely when ADMIN_TOKEN is unset)."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin token"
+        )
+
+
 def get_current_user_dependency(
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """FastAPI dependency that returns the authenticated user."""
     return get_current_user(authorization, db)
+
+
+def get_current_reader(authorization: Optional[str], db: Session):
+    """get_current_user on a read session (falls back to the primary for accounts not replicated yet)."""
+    user = get_user_by_token(authorization, db)
+    if user is None and db.info.get("replica") is not None:
+        # A brand-new account may not have reached the replica yet
+        use_primary(db)
+        user = get_user_by_token(authorization, db)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or missing token"
+        )
+    return user
+
+
+def get_current_reader_dependency(
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db)
+):
+    """get_current_user_dependency for read-only routes: looks the user up on the route's own read session."""
+    return get_current_reader(authorization, db)